@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional, Set, Tuple
 
 from app.domain.enrollment.enrollment import Enrollment
 
@@ -9,10 +9,18 @@ class EnrollmentRepository(ABC):
     def has_active_user(self, user_id: str, course_id: str) -> bool:
         raise NotImplementedError
 
+    @abstractmethod
+    def find_active_pairs(self, pairs: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        raise NotImplementedError
+
     @abstractmethod
     def enroll(self, enrollment: Enrollment):
         raise NotImplementedError
 
+    @abstractmethod
+    def enroll_many(self, enrollments: List[Enrollment]) -> List[Enrollment]:
+        raise NotImplementedError
+
     @abstractmethod
     def find_by_id(self, uuid: str) -> Optional[Enrollment]:
         raise NotImplementedError
@@ -22,5 +30,5 @@ class EnrollmentRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def unenroll_all(self, course_id: str):
+    def unenroll_all(self, course_id: str) -> List[str]:
         raise NotImplementedError
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Dict, List
 
 from app.domain.subscription.subscription import Subscription
 
@@ -23,3 +24,7 @@ class SubscriptionRepository(ABC):
     @abstractmethod
     def find_by_user_id(self, user_id: str) -> Subscription:
         raise NotImplementedError
+
+    @abstractmethod
+    def find_sub_ids_by_user_ids(self, user_ids: List[str]) -> Dict[str, int]:
+        raise NotImplementedError
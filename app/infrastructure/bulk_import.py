@@ -0,0 +1,349 @@
+import csv
+import io
+import itertools
+import json
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Tuple,
+    Union,
+)
+
+import shortuuid
+from sqlalchemy import Column, Index, MetaData, Table, and_, exists, or_, select, text
+from sqlalchemy.engine import Connection
+
+from app.domain.enrollment.enrollment import Enrollment
+from app.domain.subscription.subscription import Subscription
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+from app.infrastructure.migrations import ACTIVE_KEYS, rebuild_enrollment_rollups
+from app.infrastructure.subscription.subscription_dto import (
+    SubscriptionDTO,
+    unixtimestamp,
+)
+from app.infrastructure.subscription.subtypes import (
+    subtype_default,
+    subtype_pass,
+    subtype_plus,
+)
+
+SUB_IDS = {s.id for s in (subtype_default, subtype_pass, subtype_plus)}
+
+TRUE = {"true", "t", "1", "yes"}
+FALSE = {"false", "f", "0", "no"}
+
+
+def parse_bool(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in TRUE:
+        return True
+    if str(value).lower() in FALSE:
+        return False
+    raise ValueError(f"invalid boolean {value!r}")
+
+
+def required(record: dict, field: str) -> str:
+    value = record.get(field)
+    if value is None or str(value) == "":
+        raise ValueError(f"missing {field}")
+    return str(value)
+
+
+def build_subscription(record: dict, now: int) -> Subscription:
+    sub_id = int(required(record, "sub_id"))
+    if sub_id not in SUB_IDS:
+        raise ValueError(f"unknown sub_id {sub_id}")
+    return Subscription(
+        id=record.get("id") or shortuuid.uuid(),
+        user_id=required(record, "user_id"),
+        sub_id=sub_id,
+        active=parse_bool(record.get("active"), True),
+        updated_at=int(record.get("updated_at") or now),
+    )
+
+
+def build_enrollment(record: dict, now: int) -> Enrollment:
+    return Enrollment(
+        id=record.get("id") or shortuuid.uuid(),
+        user_id=required(record, "user_id"),
+        course_id=required(record, "course_id"),
+        active=parse_bool(record.get("active"), True),
+        updated_at=int(record.get("updated_at") or now),
+    )
+
+
+class ImportKind(NamedTuple):
+    table: Table
+    build: Callable[[dict, int], object]
+
+
+KINDS: Dict[str, ImportKind] = {
+    "subscriptions": ImportKind(SubscriptionDTO.__table__, build_subscription),
+    "enrollments": ImportKind(EnrollmentDTO.__table__, build_enrollment),
+}
+
+
+class Chunk(NamedTuple):
+    header: List[str]
+    # (line number, NDJSON line or CSV fields) per record.
+    records: List[Tuple[int, Union[str, List[str]]]]
+
+
+class Validated(NamedTuple):
+    rows: List[tuple]
+    errors: List[str]
+
+
+def read_records(
+    lines: Iterable[str], fmt: str
+) -> Tuple[List[str], Iterator[Tuple[int, Union[str, List[str]]]]]:
+    """The CSV header and the records of the input, numbered by the line they
+    start on. CSV records are split here rather than in the workers, since a
+    quoted field may span several lines."""
+    if fmt != "csv":
+        return [], enumerate(lines, start=1)
+
+    reader = csv.reader(lines)
+    header: List[str] = next(reader, [])
+
+    def records() -> Iterator[Tuple[int, List[str]]]:
+        start = reader.line_num + 1
+        for fields in reader:
+            if fields:
+                yield start, fields
+            start = reader.line_num + 1
+
+    return header, records()
+
+
+def read_chunks(lines: Iterable[str], fmt: str, size: int) -> Iterator[Chunk]:
+    """Split input into chunks of ``size`` records, each with the CSV header
+    so that it can be validated on its own."""
+    header, records = read_records(lines, fmt)
+    while True:
+        batch = list(itertools.islice(records, size))
+        if len(batch) == 0:
+            return
+        yield Chunk(header, batch)
+
+
+def validate_chunk(kind: str, chunk: Chunk) -> Validated:
+    """Parse a chunk and build a domain entity per record. Returns the rows to
+    load, in the column order of the table, and one message per rejected
+    record."""
+    table, build = KINDS[kind]
+    now = unixtimestamp()
+    rows, errors = [], []
+    for number, record in chunk.records:
+        fields: dict
+        try:
+            if isinstance(record, list):
+                fields = dict(zip(chunk.header, record))
+            elif record.strip() == "":
+                continue
+            else:
+                fields = json.loads(record)
+            entity = build(fields, now)
+        except (ValueError, TypeError, AttributeError) as e:
+            errors.append(f"line {number}: {e}")
+            continue
+        rows.append(tuple(getattr(entity, c.name) for c in table.columns))
+    return Validated(rows, errors)
+
+
+def validate_chunks(
+    kind: str, chunks: Iterator[Chunk], workers: int
+) -> Iterator[Validated]:
+    """Validate chunks in ``workers`` processes, in order, with at most two
+    chunks per worker in flight so that the input is streamed."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield validate_chunk(kind, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(validate_chunk, kind, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class ImportReport:
+    def __init__(self, kind: str):
+        self.kind: str = kind
+        self.read: int = 0
+        self.rejected: int = 0
+        self.errors: List[str] = []
+        self.existing: int = 0
+        self.deactivated: int = 0
+        self.inserted: int = 0
+        self.load_seconds: float = 0
+        self.apply_seconds: float = 0
+
+    def lines(self) -> List[str]:
+        rate = self.read / self.load_seconds if self.load_seconds else 0
+        return [
+            f"{self.kind}: read {self.read} records, rejected {self.rejected}, "
+            f"skipped {self.existing} already imported",
+            f"{self.kind}: inserted {self.inserted} rows, "
+            f"deactivated {self.deactivated} previously active rows",
+            f"{self.kind}: validated and staged in {self.load_seconds:.2f} s "
+            f"({rate:.0f} records/s), applied in {self.apply_seconds:.2f} s",
+        ]
+
+
+def staging_table(table: Table) -> Table:
+    return Table(
+        f"{table.name}_import",
+        MetaData(),
+        *[Column(c.name, c.type) for c in table.columns],
+        prefixes=["TEMPORARY"],
+    )
+
+
+def copy_rows(connection: Connection, staging: Table, rows: List[tuple]):
+    """Append rows to the staging table, with COPY on PostgreSQL."""
+    if connection.dialect.name != "postgresql":
+        connection.execute(
+            staging.insert(),
+            [dict(zip(staging.columns.keys(), row)) for row in rows],
+        )
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["t" if v is True else "f" if v is False else v for v in row])
+    buffer.seek(0)
+    columns = ", ".join(staging.columns.keys())
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {staging.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def apply_staged(
+    connection: Connection, table: Table, staging: Table, report: ImportReport
+):
+    """Move staged rows into ``table`` keeping at most one active row per key:
+    of the active rows, existing or imported, the most recent one wins."""
+    keys = ACTIVE_KEYS[table]
+    Index(f"ix_{staging.name}_keys", *[staging.c[k] for k in keys]).create(connection)
+    Index(f"ix_{staging.name}_id", staging.c.id).create(connection)
+    if connection.dialect.name == "postgresql":
+        # Temporary tables are not analyzed automatically.
+        connection.execute(text(f"ANALYZE {staging.name}"))
+
+    report.existing = connection.execute(
+        staging.delete().where(staging.c.id.in_(select(table.c.id)))
+    ).rowcount
+
+    newer = staging.alias("newer")
+    connection.execute(
+        staging.update()
+        .where(
+            staging.c.active,
+            exists().where(
+                newer.c.active,
+                *[newer.c[k] == staging.c[k] for k in keys],
+                or_(
+                    newer.c.updated_at > staging.c.updated_at,
+                    and_(
+                        newer.c.updated_at == staging.c.updated_at,
+                        newer.c.id > staging.c.id,
+                    ),
+                ),
+            ),
+        )
+        .values(active=False)
+    )
+    connection.execute(
+        staging.update()
+        .where(
+            staging.c.active,
+            exists().where(
+                table.c.active,
+                *[table.c[k] == staging.c[k] for k in keys],
+                table.c.updated_at > staging.c.updated_at,
+            ),
+        )
+        .values(active=False)
+    )
+    report.deactivated = connection.execute(
+        table.update()
+        .where(
+            table.c.active,
+            exists().where(
+                staging.c.active, *[staging.c[k] == table.c[k] for k in keys]
+            ),
+        )
+        .values(active=False)
+    ).rowcount
+    report.inserted = connection.execute(
+        table.insert().from_select(staging.columns.keys(), select(staging))
+    ).rowcount
+
+
+def import_file(
+    connection: Connection,
+    kind: str,
+    lines: Iterable[str],
+    fmt: str,
+    workers: int,
+    chunk_size: int,
+) -> ImportReport:
+    """Validate ``lines`` of CSV or NDJSON records in worker processes, stage
+    them and apply them to the table of ``kind``, all in the transaction of
+    ``connection``. Records with an id that is repeated in the input are
+    rejected; records whose id was imported before are skipped."""
+    table = KINDS[kind].table
+    report = ImportReport(kind)
+    staging = staging_table(table)
+    if connection.dialect.name == "postgresql":
+        # Writes through the API would race with resolving the active rows.
+        connection.execute(text(f"LOCK TABLE {table.name} IN SHARE ROW EXCLUSIVE MODE"))
+    staging.create(connection)
+
+    start = time.perf_counter()
+    seen = set()
+    for validated in validate_chunks(
+        kind, read_chunks(lines, fmt, chunk_size), workers
+    ):
+        rows = []
+        for row in validated.rows:
+            if row[0] in seen:
+                report.errors.append(f"duplicate id {row[0]}")
+                continue
+            seen.add(row[0])
+            rows.append(row)
+        report.read += len(validated.rows) + len(validated.errors)
+        report.errors.extend(validated.errors)
+        if rows:
+            copy_rows(connection, staging, rows)
+    report.rejected = len(report.errors)
+    report.load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    apply_staged(connection, table, staging, report)
+    if table is EnrollmentDTO.__table__:
+        rebuild_enrollment_rollups(connection)
+    staging.drop(connection)
+    report.apply_seconds = time.perf_counter() - start
+    return report
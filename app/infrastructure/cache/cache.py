@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class Cache(ABC):
+    """Key/value cache with a per-entry time to live. Values must be JSON
+    serializable, and ``get`` returns None on a miss."""
+
+    ttl: float
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: Any):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
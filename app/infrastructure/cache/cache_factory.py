@@ -0,0 +1,24 @@
+import os
+
+from app.infrastructure.cache.cache import Cache
+from app.infrastructure.cache.memory_cache import MemoryCache
+
+LOCAL_TTL = float(os.environ.get("CACHE_LOCAL_TTL", 5))
+
+
+def create_cache(namespace: str, maxsize: int, ttl: float) -> Cache:
+    """Shared Redis cache when ``CACHE_URL`` is set, per-process otherwise."""
+    url = os.environ.get("CACHE_URL")
+    if url is None or ttl <= 0:
+        return MemoryCache(maxsize=maxsize, ttl=ttl)
+
+    from redis import Redis
+
+    from app.infrastructure.cache.redis_cache import RedisCache
+
+    return RedisCache(
+        Redis.from_url(url),
+        namespace=namespace,
+        ttl=ttl,
+        local=MemoryCache(maxsize=maxsize, ttl=min(ttl, LOCAL_TTL)),
+    )
@@ -0,0 +1,34 @@
+from typing import Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.infrastructure.cache.cache import Cache
+
+
+class SessionCacheInvalidator:
+    """Drops keys written in a session from the cache right away and again
+    once the session commits, so readers that repopulated a key in between
+    do not keep the pre-commit value. Until then the keys are dirty and
+    should be read from the database."""
+
+    def __init__(self, session: Session, cache: Cache):
+        self.cache: Cache = cache
+        self.dirty: Set[str] = set()
+        event.listen(session, "after_commit", self._after_commit)
+        event.listen(session, "after_rollback", self._after_rollback)
+
+    def _after_commit(self, session: Session):
+        for key in self.dirty:
+            self.cache.delete(key)
+        self.dirty.clear()
+
+    def _after_rollback(self, session: Session):
+        self.dirty.clear()
+
+    def invalidate(self, key: str):
+        self.dirty.add(key)
+        self.cache.delete(key)
+
+    def is_dirty(self, key: str) -> bool:
+        return key in self.dirty
@@ -0,0 +1,99 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.infrastructure.cache.cache import Cache
+from app.infrastructure.cache.memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache(Cache):
+    """Cache shared by every worker through a Redis-protocol server.
+
+    Entries are stored as JSON under ``<namespace>:<key>``. Each worker keeps
+    a short-lived local copy of the entries it reads; deleting a key publishes
+    it on ``<namespace>:invalidate`` so every worker drops its local copy.
+    """
+
+    def __init__(
+        self,
+        client: Redis,
+        namespace: str,
+        ttl: float,
+        local: Optional[MemoryCache] = None,
+    ):
+        self.client: Redis = client
+        self.namespace: str = namespace
+        self.ttl: float = ttl
+        self.local: Optional[MemoryCache] = local
+        self.channel: str = f"{namespace}:invalidate"
+        self.hits: int = 0
+        self.misses: int = 0
+        self.listener = None
+        if local is not None:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_invalidate})
+            self.listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _on_invalidate(self, message):
+        key = message["data"]
+        if self.local is not None:
+            self.local.delete(key.decode() if isinstance(key, bytes) else key)
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+        try:
+            raw = self.client.get(self._key(key))
+        except RedisError as e:
+            logger.error(e)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value = json.loads(raw)
+        if self.local is not None:
+            self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        try:
+            self.client.set(self._key(key), json.dumps(value), px=int(self.ttl * 1000))
+        except RedisError as e:
+            logger.error(e)
+        if self.local is not None:
+            self.local.set(key, value)
+
+    def delete(self, key: str):
+        if self.local is not None:
+            self.local.delete(key)
+        try:
+            self.client.delete(self._key(key))
+            self.client.publish(self.channel, key)
+        except RedisError as e:
+            logger.error(e)
+
+    def stats(self) -> Dict[str, int]:
+        local = self.local.stats() if self.local is not None else {}
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": local.get("evictions", 0),
+            "size": local.get("size", 0),
+        }
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
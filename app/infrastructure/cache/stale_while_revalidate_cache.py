@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple
+
+from app.infrastructure.cache.memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+class Entry(NamedTuple):
+    value: Any
+    version: Hashable
+    writes: int
+
+
+class StaleWhileRevalidateCache:
+    """Results of async computations cached by key and tagged with a version.
+
+    A cached value is fresh while the caller asks for the version it was
+    computed for and fewer than ``max_writes`` writes have been recorded
+    since. Otherwise it is still returned, for up to ``max_stale`` seconds
+    after it was computed, while a background task recomputes it. Callers
+    without a usable value wait for the computation, which concurrent callers
+    of the same key share.
+    """
+
+    def __init__(self, max_stale: float, max_writes: int, maxsize: int = 1000):
+        self.entries: MemoryCache = MemoryCache(maxsize=maxsize, ttl=max_stale)
+        self.max_writes: int = max_writes
+        self.writes: int = 0
+        self.refreshing: Dict[str, asyncio.Task] = {}
+
+    def record_writes(self, count: int = 1):
+        self.writes += count
+
+    async def get(
+        self, key: str, version: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            return await asyncio.shield(self._refresh(key, version, compute))
+        if entry.version != version or self.writes - entry.writes >= self.max_writes:
+            self._refresh(key, version, compute)
+        return entry.value
+
+    def _refresh(
+        self, key: str, version: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        running = self.refreshing.get(key)
+        if running is not None:
+            return running
+        task = asyncio.create_task(self._compute(key, version, compute))
+        self.refreshing[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return task
+
+    async def _compute(
+        self, key: str, version: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        writes = self.writes
+        value = await compute()
+        self.entries.set(key, Entry(value, version, writes))
+        return value
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self.refreshing.get(key) is task:
+            del self.refreshing[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Could not compute %s: %s", key, task.exception())
+
+    def close(self):
+        for task in list(self.refreshing.values()):
+            task.cancel()
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+
+from app.infrastructure.cache.cache import Cache
+
+CourseFetcher = Callable[[List[str]], Awaitable[List[dict]]]
+
+
+class CourseMetadataCache:
+    """Courses microservice payloads cached by course id.
+
+    Ids missing from the cache are fetched in a single request. Concurrent
+    lookups of an id that is already being fetched wait for that request
+    instead of issuing their own, and fetch it themselves if that request is
+    cancelled. Unknown ids are not cached, so a course becomes visible as
+    soon as it exists.
+    """
+
+    def __init__(self, fetch: CourseFetcher, cache: Cache):
+        self.fetch: CourseFetcher = fetch
+        self.cache: Cache = cache
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
+    async def get_many(self, ids: List[str]) -> Dict[str, dict]:
+        found: Dict[str, dict] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        missing: List[str] = []
+        for cid in dict.fromkeys(ids):
+            cached = self.cache.get(cid)
+            if cached is not None:
+                found[cid] = cached
+            elif cid in self.in_flight:
+                waiting[cid] = self.in_flight[cid]
+            else:
+                missing.append(cid)
+
+        if missing:
+            found.update(await self._fetch_missing(missing))
+
+        orphaned = []
+        for cid, future in waiting.items():
+            try:
+                course = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                orphaned.append(cid)
+                continue
+            if course is not None:
+                found[cid] = course
+
+        if orphaned:
+            found.update(await self._fetch_missing(orphaned))
+
+        return found
+
+    async def _fetch_missing(self, missing: List[str]) -> Dict[str, dict]:
+        loop = asyncio.get_running_loop()
+        futures = {cid: loop.create_future() for cid in missing}
+        self.in_flight.update(futures)
+        try:
+            courses = {c["id"]: c for c in await self.fetch(missing)}
+        except BaseException as e:
+            for future in futures.values():
+                if isinstance(e, Exception):
+                    future.set_exception(e)
+                    future.exception()
+                else:
+                    future.cancel()
+            raise
+        finally:
+            for cid in missing:
+                self.in_flight.pop(cid, None)
+
+        for cid, future in futures.items():
+            course = courses.get(cid)
+            if course is not None:
+                self.cache.set(cid, course)
+            future.set_result(course)
+
+        return {cid: c for cid, c in courses.items() if cid in futures}
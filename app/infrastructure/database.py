@@ -1,23 +1,109 @@
+import logging
 import os
+from contextvars import ContextVar
+from typing import Callable, List, Optional, TypeVar
 
-from sqlalchemy import create_engine
+from sqlalchemy import Index, create_engine, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.infrastructure.db_executor import load_db_executor
+from app.infrastructure.metrics.query_stats import track_queries
+from app.infrastructure.metrics.registry import registry
+from app.infrastructure.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    pool_metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DATABASE_ASYNC = os.environ.get("DATABASE_ASYNC", "false").lower() == "true"
+DATABASE_QUERY_STATS = os.environ.get("DATABASE_QUERY_STATS", "false").lower() == "true"
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url(url: str) -> str:
+    """``url`` with its driver replaced by the asyncio driver of its
+    dialect."""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}://{rest}"
+
+
+def engine_options(url: str, asynchronous: bool = False) -> dict:
+    """Pool and connection settings taken from the environment. SQLite
+    keeps SQLAlchemy's pool defaults, but its connections may be used from
+    the executor threads."""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool
+        if asynchronous
+        else InstrumentedQueuePool,
+        "pool_size": int(os.environ.get("DATABASE_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("DATABASE_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(os.environ.get("DATABASE_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": os.environ.get("DATABASE_POOL_PRE_PING", "true").lower()
+        == "true",
+    }
+    statement_timeout = int(os.environ.get("DATABASE_STATEMENT_TIMEOUT", 0))
+    if statement_timeout > 0 and asynchronous:
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(statement_timeout)}
+        }
+    elif statement_timeout > 0:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={statement_timeout}"
+        }
+    return options
+
 
 try:
     DATABASE_URL = os.environ["DATABASE_URL"]
     if DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+    # With DATABASE_ASYNC requests go through async_engine and this engine
+    # only runs migrations, so it does not keep connections open.
     engine = create_engine(
         DATABASE_URL,
+        **({"poolclass": NullPool} if DATABASE_ASYNC else engine_options(DATABASE_URL)),
     )
+    if DATABASE_QUERY_STATS:
+        track_queries(engine)
     SessionLocal = sessionmaker(
         bind=engine,
         autocommit=False,
         autoflush=False,
     )
 
+    async_engine: Optional[AsyncEngine] = None
+    AsyncSessionLocal: Optional[sessionmaker] = None
+    if DATABASE_ASYNC:
+        async_engine = create_async_engine(
+            async_url(DATABASE_URL),
+            **engine_options(DATABASE_URL, asynchronous=True),
+        )
+        if DATABASE_QUERY_STATS:
+            track_queries(async_engine.sync_engine)
+        AsyncSessionLocal = sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
 except KeyError as e:
     pass
 
@@ -25,5 +111,79 @@ except KeyError as e:
 Base = declarative_base()
 
 
+def missing_indexes(bind) -> List[Index]:
+    """The indexes declared on the models that tables created by an older
+    version of the service do not have yet."""
+    missing: List[Index] = []
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        missing.extend(i for i in table.indexes if i.name not in existing)
+    return missing
+
+
 def create_tables():
+    """Create the tables that do not exist yet, with their indexes. Indexes
+    missing from existing tables are left to ``manage.py migrate``, which
+    builds them without blocking writes."""
     Base.metadata.create_all(bind=engine)
+    missing = missing_indexes(engine)
+    if missing:
+        logger.warning(
+            "Missing indexes %s, run `python manage.py migrate`",
+            ", ".join(str(i.name) for i in missing),
+        )
+
+
+db_executor = load_db_executor()
+
+POOL_GAUGES = ("size", "checked_out", "checked_in", "overflow")
+EXECUTOR_GAUGES = ("queued", "running")
+
+registry.callback_gauge(
+    "db_pool_connections",
+    "Database pool connections by state.",
+    lambda: {
+        (state,): value
+        for state, value in pool_metrics.snapshot().items()
+        if state in POOL_GAUGES
+    },
+    ("state",),
+)
+registry.callback_gauge(
+    "db_executor_calls",
+    "Database executor calls by state.",
+    lambda: {
+        (state,): value
+        for state, value in db_executor.snapshot().items()
+        if state in EXECUTOR_GAUGES
+    },
+    ("state",),
+)
+
+
+current_async_session: ContextVar[AsyncSession] = ContextVar("current_async_session")
+
+
+def use_async_session(session: AsyncSession) -> Session:
+    """Make ``run_db`` calls in the current context go through ``session`` and
+    return its ``sync_session``, which the repositories work on."""
+    current_async_session.set(session)
+    return session.sync_session
+
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Call ``fn``, which works on a session from ``get_session``, without
+    blocking the event loop.
+
+    With DATABASE_ASYNC the session is the ``sync_session`` of the
+    AsyncSession passed to ``use_async_session``: ``fn`` runs through its
+    ``run_sync``, in which every query it issues awaits the async driver.
+    Otherwise ``fn`` runs on ``db_executor``, which raises
+    ExecutorSaturatedError when too many calls are already waiting.
+    """
+    if DATABASE_ASYNC:
+        return await current_async_session.get().run_sync(lambda _: fn(*args, **kwargs))
+    return await db_executor.run(fn, *args, **kwargs)
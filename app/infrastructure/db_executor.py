@@ -0,0 +1,101 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(Exception):
+    message = "The service is overloaded, please try again later."
+
+    def __str__(self):
+        return ExecutorSaturatedError.message
+
+
+class BoundedExecutor:
+    """Runs blocking calls on ``max_workers`` threads.
+
+    At most ``max_queue`` calls may wait for a thread; further calls are
+    rejected with ExecutorSaturatedError instead of piling up behind the
+    ones already queued. Calls run in a copy of the caller's context.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers: int = max_workers
+        self.max_queue: int = max_queue
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db"
+        )
+        self.lock = threading.Lock()
+        self.queued: int = 0
+        self.running: int = 0
+        self.completed: int = 0
+        self.rejected: int = 0
+        self.wait_seconds_total: float = 0.0
+        self.wait_seconds_max: float = 0.0
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        with self.lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError
+            self.queued += 1
+
+        context = contextvars.copy_context()
+        enqueued = time.perf_counter()
+
+        def call():
+            waited = time.perf_counter() - enqueued
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        future = self.executor.submit(call)
+        future.add_done_callback(self._dequeue_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _dequeue_if_cancelled(self, future: Future):
+        if future.cancelled():
+            with self.lock:
+                self.queued -= 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+def load_db_executor() -> BoundedExecutor:
+    """Executor with one thread per connection the database pool can open
+    unless DATABASE_EXECUTOR_WORKERS says otherwise, and room for
+    DATABASE_EXECUTOR_QUEUE waiting calls."""
+    connections = int(os.environ.get("DATABASE_POOL_SIZE", 10)) + int(
+        os.environ.get("DATABASE_MAX_OVERFLOW", 10)
+    )
+    return BoundedExecutor(
+        max_workers=int(os.environ.get("DATABASE_EXECUTOR_WORKERS", connections)),
+        max_queue=int(os.environ.get("DATABASE_EXECUTOR_QUEUE", 100)),
+    )
@@ -0,0 +1,23 @@
+from typing import Dict
+
+from sqlalchemy.orm.session import Session
+
+from ..cache.cache import Cache
+from .enrollment_query_service import EnrollmentQueryServiceImpl
+
+
+class CachedEnrollmentQueryServiceImpl(EnrollmentQueryServiceImpl):
+    """Serves the courses a user is or was enrolled in from a cache keyed by
+    user id, invalidated by CachedEnrollmentRepositoryImpl."""
+
+    def __init__(self, session: Session, cache: Cache):
+        super().__init__(session)
+        self.cache: Cache = cache
+
+    def fetch_courses_from_user(self, id: str) -> Dict[str, bool]:
+        cached = self.cache.get(id)
+        if cached is not None:
+            return cached
+        courses = super().fetch_courses_from_user(id)
+        self.cache.set(id, courses)
+        return courses
@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.domain.enrollment.enrollment import Enrollment
+from app.infrastructure.cache.cache import Cache
+from app.infrastructure.cache.cache_invalidator import SessionCacheInvalidator
+from app.infrastructure.enrollment.enrollment_repository import (
+    EnrollmentRepositoryImpl,
+)
+
+
+class CachedEnrollmentRepositoryImpl(EnrollmentRepositoryImpl):
+    """Invalidates the cached enrollment history of every user it writes."""
+
+    def __init__(self, session: Session, cache: Cache):
+        super().__init__(session)
+        self.invalidator = SessionCacheInvalidator(session, cache)
+
+    def enroll(self, enrollment: Enrollment):
+        self.invalidator.invalidate(enrollment.user_id)
+        super().enroll(enrollment)
+
+    def enroll_many(self, enrollments: List[Enrollment]) -> List[Enrollment]:
+        for enrollment in enrollments:
+            self.invalidator.invalidate(enrollment.user_id)
+        return super().enroll_many(enrollments)
+
+    def unenroll(self, user_id: str, course_id: str) -> Optional[Enrollment]:
+        self.invalidator.invalidate(user_id)
+        return super().unenroll(user_id, course_id)
+
+    def unenroll_all(self, course_id: str) -> List[str]:
+        user_ids = super().unenroll_all(course_id)
+        for user_id in user_ids:
+            self.invalidator.invalidate(user_id)
+        return user_ids
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Union
 
-from sqlalchemy import BigInteger, Boolean, Column, String
+from sqlalchemy import BigInteger, Boolean, Column, Index, String, true
 
 from app.domain.enrollment.enrollment import Enrollment
 from app.infrastructure.database import Base
@@ -21,6 +21,26 @@ class EnrollmentDTO(Base):
     active: Union[bool, Column] = Column(Boolean, nullable=False)
     updated_at: Union[int, Column] = Column(BigInteger, nullable=False)
 
+    __table_args__ = (
+        Index(
+            "uq_enrollments_user_id_course_id_active",
+            user_id,
+            course_id,
+            unique=True,
+            postgresql_where=active,
+            sqlite_where=active == true(),
+        ),
+        Index("ix_enrollments_course_id_active_user_id", course_id, active, user_id),
+        Index("ix_enrollments_user_id", user_id),
+        Index(
+            "ix_enrollments_updated_at_course_id_active",
+            updated_at,
+            course_id,
+            postgresql_where=active,
+            sqlite_where=active == true(),
+        ),
+    )
+
     def to_entity(self) -> Enrollment:
         return Enrollment(
             id=self.id,
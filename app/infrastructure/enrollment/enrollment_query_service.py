@@ -1,14 +1,18 @@
-from typing import List, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import and_, case, func, select
 from sqlalchemy.orm.session import Session
 
 from ...usecase.enrollment.enrollment_query_model import EnrollmentReadModel
 from ...usecase.enrollment.enrollment_query_service import EnrollmentQueryService
 from ...usecase.metrics.enrollment_metrics_query_model import EnrollmentMetricsReadModel
+from ..metrics.query_metrics import label_queries
+from ..subscription.subscription_dto import SubscriptionDTO
 from .enrollment_dto import EnrollmentDTO
+from .enrollment_rollup_dto import enrollment_counts
 
 
+@label_queries
 class EnrollmentQueryServiceImpl(EnrollmentQueryService):
     def __init__(self, session: Session):
         self.session: Session = session
@@ -23,6 +27,52 @@ class EnrollmentQueryServiceImpl(EnrollmentQueryService):
 
         return list(map(lambda enr_dto: enr_dto.to_read_model(), enr_dtos))
 
+    def fetch_user_ids_from_course(
+        self,
+        id: str,
+        only_active: bool,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> List[str]:
+        try:
+            query = self.session.query(EnrollmentDTO.user_id).filter(
+                EnrollmentDTO.course_id == id
+            )
+            if only_active:
+                query = query.filter(EnrollmentDTO.active)
+            if after is not None:
+                query = query.filter(EnrollmentDTO.user_id > after)
+            query = query.distinct().order_by(EnrollmentDTO.user_id)
+            if limit is not None:
+                query = query.limit(limit)
+            rows = query.all()
+        except:
+            raise
+
+        return [user_id for user_id, in rows]
+
+    def stream_enrollments(
+        self, course_id: Optional[str], only_active: bool, batch_size: int
+    ) -> Generator[List[tuple], None, None]:
+        """(course_id, user_id, active, updated_at) of the enrollments, in
+        batches read from a server-side cursor."""
+        query = select(
+            EnrollmentDTO.course_id,
+            EnrollmentDTO.user_id,
+            EnrollmentDTO.active,
+            EnrollmentDTO.updated_at,
+        )
+        if course_id is not None:
+            query = query.where(EnrollmentDTO.course_id == course_id)
+        if only_active:
+            query = query.where(EnrollmentDTO.active)
+        result = self.session.execute(query.execution_options(stream_results=True))
+        try:
+            for rows in result.partitions(batch_size):
+                yield [tuple(row) for row in rows]
+        finally:
+            result.close()
+
     def fetch_enrollments_from_user(self, id: str) -> List[EnrollmentReadModel]:
         try:
             enr_dtos = self.session.query(EnrollmentDTO).filter_by(user_id=id).all()
@@ -33,35 +83,71 @@ class EnrollmentQueryServiceImpl(EnrollmentQueryService):
 
         return list(map(lambda enr_dto: enr_dto.to_read_model(), enr_dtos))
 
+    def fetch_courses_from_user(self, id: str) -> Dict[str, bool]:
+        enrolled = func.max(case((EnrollmentDTO.active, 1), else_=0))
+        try:
+            rows = (
+                self.session.query(EnrollmentDTO.course_id, enrolled)
+                .filter(EnrollmentDTO.user_id == id)
+                .group_by(EnrollmentDTO.course_id)
+                .order_by(EnrollmentDTO.course_id)
+                .all()
+            )
+        except:
+            raise
+
+        return {course_id: bool(active) for course_id, active in rows}
+
+    def count_active_users_by_sub_id(self, id: str) -> Dict[int, int]:
+        try:
+            rows = (
+                self.session.query(SubscriptionDTO.sub_id, func.count(EnrollmentDTO.id))
+                .select_from(EnrollmentDTO)
+                .join(
+                    SubscriptionDTO,
+                    and_(
+                        SubscriptionDTO.user_id == EnrollmentDTO.user_id,
+                        SubscriptionDTO.active,
+                    ),
+                )
+                .filter(EnrollmentDTO.course_id == id, EnrollmentDTO.active)
+                .group_by(SubscriptionDTO.sub_id)
+                .all()
+            )
+        except:
+            raise
+
+        return dict(rows)
+
     def get_enrollment_metrics(
         self,
         limit: int,
         min_timestamp: int,
         max_timestamp: int,
     ) -> Tuple[List[EnrollmentMetricsReadModel], int]:
+        counts = enrollment_counts(min_timestamp, max_timestamp).subquery()
+        count = func.sum(counts.c.count)
         try:
+            courses = (
+                self.session.query(counts.c.course_id, count)
+                .group_by(counts.c.course_id)
+                .having(count > 0)
+            )
+            if limit <= 0:
+                return [], courses.count()
+
             enr_tuples = (
-                self.session.query(
-                    EnrollmentDTO.course_id,
-                    func.count(EnrollmentDTO.course_id),
-                )
-                .filter(
-                    EnrollmentDTO.active,
-                    EnrollmentDTO.updated_at >= min_timestamp,
-                    EnrollmentDTO.updated_at <= max_timestamp,
-                )
-                .group_by(EnrollmentDTO.course_id)
+                courses.add_columns(func.count().over())
+                .order_by(count.desc(), counts.c.course_id)
+                .limit(limit)
                 .all()
             )
-            enrollments = list(
-                map(
-                    lambda e: EnrollmentMetricsReadModel(course_id=e[0], count=e[1]),
-                    enr_tuples,
-                )
-            )
-            enrollments = sorted(enrollments, key=lambda x: x.count, reverse=True)
-
         except:
             raise
 
-        return enrollments[0:limit], len(enrollments)
+        enrollments = [
+            EnrollmentMetricsReadModel(course_id=course_id, count=n)
+            for course_id, n, _ in enr_tuples
+        ]
+        total = enr_tuples[0][2] if enr_tuples else 0
+        return enrollments, total
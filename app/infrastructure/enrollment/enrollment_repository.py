@@ -1,17 +1,29 @@
-from typing import Optional
+from collections import Counter
+from typing import List, Optional, Set, Tuple
 
+from sqlalchemy import insert, select, tuple_, update
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 
 from app.domain.enrollment.enrollment import Enrollment
 from app.domain.enrollment.enrollment_exception import UserNotEnrolledError
 from app.domain.enrollment.enrollment_repository import EnrollmentRepository
-from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO, unixtimestamp
+from app.infrastructure.enrollment.enrollment_rollup_dto import (
+    count_enrollment,
+    count_enrollments,
+    uncount_deactivated,
+)
+from app.infrastructure.metrics.query_metrics import label_queries
 from app.usecase.enrollment.enrollment_command_usecase import (
     EnrollmentCommandUseCaseUnitOfWork,
 )
 
+# Keeps the bound parameters of a lookup well below SQLite's and asyncpg's limits.
+PAIRS_PER_QUERY = 5000
+
 
+@label_queries
 class EnrollmentRepositoryImpl(EnrollmentRepository):
     def __init__(self, session: Session):
         self.session: Session = session
@@ -25,21 +37,82 @@ class EnrollmentRepositoryImpl(EnrollmentRepository):
             return False
         return True
 
+    def find_active_pairs(self, pairs: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        found: Set[Tuple[str, str]] = set()
+        try:
+            for start in range(0, len(pairs), PAIRS_PER_QUERY):
+                rows = (
+                    self.session.query(EnrollmentDTO.user_id, EnrollmentDTO.course_id)
+                    .filter(
+                        tuple_(EnrollmentDTO.user_id, EnrollmentDTO.course_id).in_(
+                            pairs[start : start + PAIRS_PER_QUERY]
+                        ),
+                        EnrollmentDTO.active,
+                    )
+                    .all()
+                )
+                found.update((user_id, course_id) for user_id, course_id in rows)
+        except:
+            raise
+
+        return found
+
     def enroll(self, enrollment: Enrollment):
         enr_dto = EnrollmentDTO.from_entity(enrollment)
         try:
             self.session.add(enr_dto)
+            count_enrollment(
+                self.session, enr_dto.course_id, enr_dto.updated_at, delta=1
+            )
+        except:
+            raise
+
+    def enroll_many(self, enrollments: List[Enrollment]) -> List[Enrollment]:
+        now = unixtimestamp()
+        rows = [
+            dict(
+                id=e.id,
+                user_id=e.user_id,
+                course_id=e.course_id,
+                active=e.active,
+                updated_at=now,
+            )
+            for e in enrollments
+        ]
+        if len(rows) == 0:
+            return []
+        try:
+            # One executemany, which psycopg2 sends as multi-row VALUES pages.
+            self.session.execute(insert(EnrollmentDTO), rows)
+            count_enrollments(
+                self.session, now, Counter(e.course_id for e in enrollments if e.active)
+            )
         except:
             raise
 
+        return [
+            Enrollment(
+                id=e.id,
+                user_id=e.user_id,
+                course_id=e.course_id,
+                active=e.active,
+                updated_at=now,
+            )
+            for e in enrollments
+        ]
+
     def unenroll(self, user_id: str, course_id: str) -> Optional[Enrollment]:
         try:
             enr_dto = (
                 self.session.query(EnrollmentDTO)
                 .filter_by(user_id=user_id, course_id=course_id, active=True)
+                .with_for_update()
                 .one()
             )
             enr_dto.active = False
+            count_enrollment(
+                self.session, enr_dto.course_id, enr_dto.updated_at, delta=-1
+            )
         except NoResultFound:
             raise UserNotEnrolledError
         except:
@@ -47,18 +120,43 @@ class EnrollmentRepositoryImpl(EnrollmentRepository):
 
         return enr_dto.to_entity()
 
-    def unenroll_all(self, course_id: str):
+    def unenroll_all(self, course_id: str) -> List[str]:
+        # RETURNING only sees the new updated_at, so the old one comes from a
+        # self-join. Re-checking active on the updated row skips enrollments
+        # that a concurrent unenroll deactivated first. Core rather than ORM
+        # constructs, as ORM selects drop the CTE that updates the rollup.
+        table = EnrollmentDTO.__table__
+        old = (
+            select(table.c.id, table.c.updated_at)
+            .where(table.c.course_id == course_id, table.c.active)
+            .subquery("old")
+        )
+        deactivated = (
+            update(table)
+            .where(table.c.id == old.c.id, table.c.active)
+            .values(active=False, updated_at=unixtimestamp())
+            .returning(
+                table.c.user_id,
+                table.c.course_id,
+                old.c.updated_at.label("old_updated_at"),
+            )
+            .cte("deactivated")
+        )
         try:
-            enr_dtos = (
-                self.session.query(EnrollmentDTO)
-                .filter_by(course_id=course_id, active=True)
+            user_ids = (
+                self.session.execute(
+                    select(deactivated.c.user_id).add_cte(
+                        uncount_deactivated(self.session, deactivated)
+                    )
+                )
+                .scalars()
                 .all()
             )
-            for i in enr_dtos:
-                i.active = False
         except:
             raise
 
+        return user_ids
+
     def find_by_id(self, uuid: str) -> Optional[Enrollment]:
         try:
             enr_dto = self.session.query(EnrollmentDTO).filter_by(id=uuid).one()
@@ -70,6 +168,7 @@ class EnrollmentRepositoryImpl(EnrollmentRepository):
         return enr_dto.to_entity()
 
 
+@label_queries
 class EnrollmentCommandUseCaseUnitOfWorkImpl(EnrollmentCommandUseCaseUnitOfWork):
     def __init__(
         self,
@@ -0,0 +1,132 @@
+from typing import Dict, List, Union
+
+from sqlalchemy import BigInteger, Column, Index, Integer, String, func, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select, select, union_all
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.sql.selectable import CTE, SelectBase
+
+from app.infrastructure.database import Base
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+
+BUCKET_MS = 24 * 60 * 60 * 1000
+
+INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def bucket_of(timestamp: int) -> int:
+    return timestamp - timestamp % BUCKET_MS
+
+
+# Inlined rather than bound so that asyncpg sees the same expression in the
+# SELECT list and the GROUP BY.
+UPDATED_AT_BUCKET = (
+    EnrollmentDTO.updated_at - EnrollmentDTO.updated_at % literal_column(str(BUCKET_MS))
+)
+
+
+class EnrollmentRollupDTO(Base):
+    """Active enrollments per course, bucketed by the (UTC) day of their
+    ``updated_at``. Kept up to date by EnrollmentRepositoryImpl in the same
+    transaction as the enrollments themselves."""
+
+    __tablename__ = "enrollment_rollups"
+    course_id: Union[str, Column] = Column(String, primary_key=True)
+    bucket: Union[int, Column] = Column(BigInteger, primary_key=True)
+    count: Union[int, Column] = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_enrollment_rollups_bucket_course_id", bucket, course_id, count),
+    )
+
+
+def upsert_counts_stmt(
+    session: Session, rows: Union[dict, List[dict], Select]
+) -> Insert:
+    """Add ``rows`` of (course_id, bucket, count) to the rollup, creating the
+    buckets that do not exist yet."""
+    table = EnrollmentRollupDTO.__table__
+    stmt = INSERTS[session.get_bind().dialect.name](table)
+    if isinstance(rows, Select):
+        stmt = stmt.from_select(["course_id", "bucket", "count"], rows)
+    else:
+        stmt = stmt.values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.course_id, table.c.bucket],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+
+
+def upsert_counts(session: Session, rows: Union[dict, List[dict], Select]):
+    session.execute(upsert_counts_stmt(session, rows))
+
+
+def count_enrollment(session: Session, course_id: str, updated_at: int, delta: int):
+    upsert_counts(
+        session,
+        dict(course_id=course_id, bucket=bucket_of(updated_at), count=delta),
+    )
+
+
+def count_enrollments(session: Session, updated_at: int, counts: Dict[str, int]):
+    """Add ``counts`` of enrollments per course made at ``updated_at``."""
+    if len(counts) == 0:
+        return
+    bucket = bucket_of(updated_at)
+    upsert_counts(
+        session,
+        [dict(course_id=c, bucket=bucket, count=n) for c, n in counts.items()],
+    )
+
+
+def uncount_deactivated(session: Session, deactivated: CTE) -> CTE:
+    """A data-modifying CTE that subtracts the enrollments returned by the
+    ``deactivated`` CTE, as (course_id, old_updated_at), from the rollup.
+    Attached to the same statement, it counts exactly the rows that the
+    UPDATE changed."""
+    old_bucket = deactivated.c.old_updated_at - deactivated.c.old_updated_at % (
+        literal_column(str(BUCKET_MS))
+    )
+    return upsert_counts_stmt(
+        session,
+        select(deactivated.c.course_id, old_bucket, -func.count()).group_by(
+            deactivated.c.course_id, old_bucket
+        ),
+    ).cte("uncounted")
+
+
+def enrollment_counts(min_timestamp: int, max_timestamp: int) -> SelectBase:
+    """(course_id, count) rows that add up to the active enrollments updated in
+    [min_timestamp, max_timestamp]. Whole days are read from the rollup and
+    only the partial days at either end from the enrollments table."""
+    first = -(-min_timestamp // BUCKET_MS) * BUCKET_MS
+    end = (max_timestamp + 1) // BUCKET_MS * BUCKET_MS
+    if first >= end:
+        return raw_counts(min_timestamp, max_timestamp + 1)
+
+    rolled = (
+        select(
+            EnrollmentRollupDTO.course_id,
+            func.sum(EnrollmentRollupDTO.count).label("count"),
+        )
+        .where(EnrollmentRollupDTO.bucket >= first, EnrollmentRollupDTO.bucket < end)
+        .group_by(EnrollmentRollupDTO.course_id)
+    )
+    return union_all(
+        rolled,
+        raw_counts(min_timestamp, first),
+        raw_counts(end, max_timestamp + 1),
+    )
+
+
+def raw_counts(start: int, end: int) -> Select:
+    return (
+        select(EnrollmentDTO.course_id, func.count().label("count"))
+        .where(
+            EnrollmentDTO.active,
+            EnrollmentDTO.updated_at >= start,
+            EnrollmentDTO.updated_at < end,
+        )
+        .group_by(EnrollmentDTO.course_id)
+    )
@@ -0,0 +1,42 @@
+from typing import Dict, Tuple
+
+from app.infrastructure.cache.cache import Cache
+from app.infrastructure.metrics.registry import registry
+
+caches: Dict[str, Cache] = {}
+
+
+def stat(name: str) -> Dict[Tuple[str, ...], float]:
+    return {(cache,): c.stats().get(name, 0) for cache, c in list(caches.items())}
+
+
+registry.callback_counter(
+    "cache_hits",
+    "Cache lookups that found a fresh entry, by cache.",
+    lambda: stat("hits"),
+    ("cache",),
+)
+registry.callback_counter(
+    "cache_misses",
+    "Cache lookups that found no fresh entry, by cache.",
+    lambda: stat("misses"),
+    ("cache",),
+)
+registry.callback_counter(
+    "cache_evictions",
+    "Entries evicted to keep caches within their size, by cache.",
+    lambda: stat("evictions"),
+    ("cache",),
+)
+registry.callback_gauge(
+    "cache_entries",
+    "Entries held in the process by cache.",
+    lambda: stat("size"),
+    ("cache",),
+)
+
+
+def register_cache(name: str, cache: Cache) -> Cache:
+    """Serve the ``stats`` of ``cache`` at /metrics under ``name``."""
+    caches[name] = cache
+    return cache
@@ -0,0 +1,133 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+REPEATED_QUERY_THRESHOLD = 3
+
+_BIND_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,?)+\)")
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with bound parameter lists collapsed, so that queries
+    differing only in the length of an IN list have the same shape."""
+    return _BIND_LIST.sub("(?)", " ".join(statement.split()))
+
+
+class QueryStats:
+    """Statements executed while collecting, with their total time and the
+    number of times each statement shape ran."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count: int = 0
+        self.seconds: float = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        shape = statement_shape(statement)
+        with self.lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+
+    def repeated(self, threshold: int = REPEATED_QUERY_THRESHOLD) -> Dict[str, int]:
+        """Shapes that ran at least ``threshold`` times, a likely N+1."""
+        with self.lock:
+            return {s: n for s, n in self.shapes.items() if n >= threshold}
+
+    def report(self) -> str:
+        with self.lock:
+            lines: List[str] = [
+                f"{self.count} queries in {self.seconds * 1000:.2f} ms"
+            ] + [f"  {n} x {shape}" for shape, n in self.shapes.most_common()]
+        return "\n".join(lines)
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+@contextmanager
+def collect_queries() -> Iterator[QueryStats]:
+    """Collect the statements executed by tracked engines in this context,
+    including work it hands to run_db."""
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if current_query_stats.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_stats_start)
+
+
+def track_queries(engine: Engine):
+    """Report the statements ``engine`` executes to ``collect_queries``.
+
+    Cursor event listeners slow down every statement, so engines are only
+    tracked in debug mode and in tests.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting the queries of each request.
+
+    Responses get X-DB-Query-Count, X-DB-Query-Time-Ms and
+    X-DB-Repeated-Queries headers, and requests that repeat a statement
+    shape ``threshold`` times are logged as suspected N+1 queries.
+    """
+
+    def __init__(self, app: ASGIApp, threshold: int = REPEATED_QUERY_THRESHOLD):
+        self.app: ASGIApp = app
+        self.threshold: int = threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_queries() as stats:
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    repeated = stats.repeated(self.threshold)
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Query-Count"] = str(stats.count)
+                    headers["X-DB-Query-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+                    headers["X-DB-Repeated-Queries"] = str(len(repeated))
+                    for shape, n in repeated.items():
+                        logger.warning(
+                            "Suspected N+1 in %s %s: %d x %s",
+                            scope["method"],
+                            scope["path"],
+                            n,
+                            shape,
+                        )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,268 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Generic, Iterable, List, Sequence, Tuple, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+ChildT = TypeVar("ChildT")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric(Generic[ChildT]):
+    """A named metric with one child per combination of label values.
+
+    ``labels`` is meant to be called once per combination and its result
+    kept, so that the hot path only updates the child.
+    """
+
+    type: str = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name: str = name
+        self.help: str = help
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], ChildT] = {}
+        self.lock = threading.Lock()
+
+    def _new_child(self) -> ChildT:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> ChildT:
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self.lock:
+                child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def _labelled(self) -> List[Tuple[Dict[str, str], ChildT]]:
+        with self.lock:
+            items = list(self.children.items())
+        return [(dict(zip(self.labelnames, values)), c) for values, c in items]
+
+
+class _Value:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value: float = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric["_Value"]):
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, child in self._labelled():
+            yield self.name + "_total", labels, child.value
+
+
+class Gauge(Metric["_Value"]):
+    type = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, child in self._labelled():
+            yield self.name, labels, child.value
+
+
+class CallbackGauge(Metric[None]):
+    """Gauge whose values are read from ``callback`` when metrics are
+    collected. ``callback`` returns a value per tuple of label values."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Sequence[str] = (),
+    ):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def samples(self) -> Iterable[Sample]:
+        for values, value in self.callback().items():
+            yield self.name, dict(zip(self.labelnames, values)), value
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter whose totals are kept elsewhere and read from ``callback``
+    when metrics are collected."""
+
+    type = "counter"
+
+    def samples(self) -> Iterable[Sample]:
+        for name, labels, value in super().samples():
+            yield name + "_total", labels, value
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.lock = threading.Lock()
+        self.buckets: Tuple[float, ...] = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+
+    def observe(self, value: float):
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Histogram(Metric["_HistogramValue"]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, child in self._labelled():
+            with child.lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = {**labels, "le": _format_value(bound)}
+                yield self.name + "_bucket", bucket_labels, cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, cumulative
+
+
+class Registry:
+    """Metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"{metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def callback_gauge(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Sequence[str] = (),
+    ):
+        return self.register(CallbackGauge(name, help, callback, labelnames))
+
+    def callback_counter(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Sequence[str] = (),
+    ):
+        return self.register(CallbackCounter(name, help, callback, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,71 @@
+import time
+from typing import Dict
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.metrics.registry import registry
+
+UNMATCHED_ROUTE = "unmatched"
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route"),
+)
+requests_total = registry.counter(
+    "http_requests",
+    "HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being served."
+).labels()
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording request latency and status per route
+    template, e.g. ``/subscriptions/{course_id}/enrollments``, and the number
+    of requests in flight.
+
+    The template is looked up from the endpoint the router stored in the
+    scope, so paths that match no route share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app: ASGIApp = app
+        self.templates: Dict[object, str] = {}
+
+    def route_template(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if endpoint not in self.templates:
+            for route in scope["app"].router.routes:
+                if hasattr(route, "endpoint") and hasattr(route, "path"):
+                    self.templates[route.endpoint] = route.path
+        return self.templates.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            requests_in_flight.dec()
+            route = self.route_template(scope)
+            method = scope["method"]
+            request_duration.labels(method, route).observe(elapsed)
+            requests_total.labels(method, route, str(status_code)).inc()
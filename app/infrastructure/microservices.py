@@ -0,0 +1,125 @@
+import ast
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app.infrastructure.metrics.registry import registry
+
+logger = logging.getLogger(__name__)
+
+request_duration = registry.histogram(
+    "microservice_request_duration_seconds",
+    "Latency of requests to downstream microservices.",
+    ("service",),
+)
+responses_total = registry.counter(
+    "microservice_responses",
+    "Downstream microservice responses by status code.",
+    ("service", "status"),
+)
+errors_total = registry.counter(
+    "microservice_errors",
+    "Downstream microservice requests that got no response, by error.",
+    ("service", "error"),
+)
+
+DEFAULT_POOL_SETTINGS: Dict[str, float] = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0,
+    "timeout": 10.0,
+    "connect_timeout": 3.0,
+}
+
+
+class MicroserviceNotConfiguredError(Exception):
+    message = "The microservice you specified is not configured."
+
+    def __str__(self):
+        return MicroserviceNotConfiguredError.message
+
+
+def _literal_env(name: str) -> dict:
+    try:
+        return ast.literal_eval(os.environ[name])
+    except KeyError:
+        return {}
+
+
+def load_microservices() -> Dict[str, str]:
+    return _literal_env("MICROSERVICES")
+
+
+def load_pool_settings() -> Dict[str, dict]:
+    return _literal_env("MICROSERVICES_POOL")
+
+
+class MicroserviceClients:
+    """One keep-alive connection pool per downstream microservice.
+
+    Clients are created on application startup and shared by every request,
+    so each call reuses an open connection instead of paying the TCP/TLS
+    handshake again.
+    """
+
+    def __init__(
+        self,
+        urls: Dict[str, str],
+        settings: Optional[Dict[str, dict]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.urls: Dict[str, str] = urls
+        self.settings: Dict[str, dict] = settings or {}
+        self.transport: Optional[httpx.AsyncBaseTransport] = transport
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+
+    def service_settings(self, service: str) -> Dict[str, float]:
+        return {**DEFAULT_POOL_SETTINGS, **self.settings.get(service, {})}
+
+    def _create_client(self, service: str) -> httpx.AsyncClient:
+        s = self.service_settings(service)
+        return httpx.AsyncClient(
+            base_url=self.urls[service],
+            limits=httpx.Limits(
+                max_connections=int(s["max_connections"]),
+                max_keepalive_connections=int(s["max_keepalive_connections"]),
+                keepalive_expiry=s["keepalive_expiry"],
+            ),
+            timeout=httpx.Timeout(s["timeout"], connect=s["connect_timeout"]),
+            transport=self.transport,
+        )
+
+    async def start(self):
+        for service in self.urls:
+            if service not in self.clients:
+                self.clients[service] = self._create_client(service)
+
+    async def close(self):
+        clients, self.clients = self.clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        if service not in self.urls:
+            raise MicroserviceNotConfiguredError
+        if service not in self.clients:
+            self.clients[service] = self._create_client(service)
+        return self.clients[service]
+
+    async def request(
+        self, service: str, method: str, path: str, **kwargs
+    ) -> httpx.Response:
+        client = self.get(service)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            errors_total.labels(service, type(e).__name__).inc()
+            raise
+        finally:
+            request_duration.labels(service).observe(time.perf_counter() - start)
+        responses_total.labels(service, str(response.status_code)).inc()
+        return response
@@ -0,0 +1,112 @@
+import logging
+from typing import Dict, List
+
+from sqlalchemy import Table, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.infrastructure.database import missing_indexes
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+from app.infrastructure.enrollment.enrollment_rollup_dto import (
+    UPDATED_AT_BUCKET,
+    EnrollmentRollupDTO,
+)
+from app.infrastructure.subscription.subscription_dto import SubscriptionDTO
+
+logger = logging.getLogger(__name__)
+
+# Columns that identify a row which may be active only once.
+ACTIVE_KEYS: Dict[Table, List[str]] = {
+    SubscriptionDTO.__table__: ["user_id"],
+    EnrollmentDTO.__table__: ["user_id", "course_id"],
+}
+
+# Indexes of older versions that a declared index now covers.
+SUPERSEDED_INDEXES: Dict[Table, List[str]] = {
+    EnrollmentDTO.__table__: ["ix_enrollments_course_id_active"],
+}
+
+
+def deactivate_duplicate_active_rows(connection: Connection) -> Dict[str, int]:
+    """Keep only the most recent active row per key so that the partial unique
+    indexes can be built on databases created before they existed."""
+    deactivated = {}
+    for table, keys in ACTIVE_KEYS.items():
+        ranked = (
+            select(
+                table.c.id,
+                func.row_number()
+                .over(
+                    partition_by=[table.c[k] for k in keys],
+                    order_by=[table.c.updated_at.desc(), table.c.id.desc()],
+                )
+                .label("rn"),
+            )
+            .where(table.c.active)
+            .subquery()
+        )
+        result = connection.execute(
+            update(table)
+            .where(table.c.id.in_(select(ranked.c.id).where(ranked.c.rn > 1)))
+            .values(active=False)
+        )
+        deactivated[table.name] = result.rowcount
+    return deactivated
+
+
+def rebuild_enrollment_rollups(connection: Connection) -> int:
+    """Recount the enrollment rollup from the enrollments table, for databases
+    created before it existed. On PostgreSQL the rollup is locked meanwhile,
+    so enrollments made during the rebuild are neither lost nor counted twice.
+    Returns the number of buckets written."""
+    table = EnrollmentRollupDTO.__table__
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(f"LOCK TABLE {table.name} IN EXCLUSIVE MODE"))
+    connection.execute(table.delete())
+    result = connection.execute(
+        table.insert().from_select(
+            ["course_id", "bucket", "count"],
+            select(EnrollmentDTO.course_id, UPDATED_AT_BUCKET, func.count())
+            .where(EnrollmentDTO.active)
+            .group_by(EnrollmentDTO.course_id, UPDATED_AT_BUCKET),
+        )
+    )
+    return result.rowcount
+
+
+def create_missing_indexes(engine: Engine) -> List[str]:
+    """Build the declared indexes that existing tables lack. On PostgreSQL they
+    are built CONCURRENTLY, outside of a transaction, so that the service
+    keeps writing to the tables meanwhile; an index that fails to build is
+    dropped again rather than left invalid."""
+    created = []
+    concurrently = engine.dialect.name == "postgresql"
+    for index in missing_indexes(engine):
+        with engine.connect() as connection:
+            if concurrently:
+                connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+                index.dialect_kwargs["postgresql_concurrently"] = True
+            try:
+                index.create(bind=connection)
+                created.append(str(index.name))
+            except IntegrityError as e:
+                logger.warning("Could not create %s: %s", index.name, e)
+                if concurrently:
+                    connection.execute(
+                        text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+                    )
+            finally:
+                if concurrently:
+                    index.dialect_kwargs["postgresql_concurrently"] = False
+    return created
+
+
+def drop_superseded_indexes(connection: Connection) -> List[str]:
+    dropped = []
+    for table, names in SUPERSEDED_INDEXES.items():
+        existing = {i["name"] for i in inspect(connection).get_indexes(table.name)}
+        for name in names:
+            if name in existing:
+                connection.execute(text(f"DROP INDEX {name}"))
+                dropped.append(name)
+    return dropped
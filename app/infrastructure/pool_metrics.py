@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolMetrics:
+    """Connection checkout counters of a pool, read through ``snapshot``."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts: int = 0
+        self.waits: int = 0
+        self.timeouts: int = 0
+        self.checkout_seconds_total: float = 0.0
+        self.checkout_seconds_max: float = 0.0
+        self.pool: Optional[Pool] = None
+
+    def observe_checkout(self, seconds: float, waited: bool):
+        with self.lock:
+            self.checkouts += 1
+            self.waits += int(waited)
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+
+    def observe_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            metrics: Dict[str, float] = {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "checkout_seconds_total": self.checkout_seconds_total,
+                "checkout_seconds_max": self.checkout_seconds_max,
+            }
+        if isinstance(self.pool, QueuePool):
+            metrics.update(
+                size=self.pool.size(),
+                checked_out=self.pool.checkedout(),
+                checked_in=self.pool.checkedin(),
+                overflow=self.pool.overflow(),
+            )
+        return metrics
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports checkout latency, waits and timeouts to
+    ``pool_metrics``."""
+
+    metrics: PoolMetrics = pool_metrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics.pool = self
+
+    def connect(self):
+        waited = self.checkedin() == 0 and self.overflow() >= self._max_overflow
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.observe_timeout()
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - start, waited)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool for asyncio drivers."""
@@ -0,0 +1,73 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session
+
+from app.domain.subscription.subscription import Subscription
+from app.infrastructure.cache.cache import Cache
+from app.infrastructure.cache.cache_invalidator import SessionCacheInvalidator
+from app.infrastructure.subscription.subscription_repository import (
+    SubscriptionRepositoryImpl,
+)
+
+
+class CachedSubscriptionRepositoryImpl(SubscriptionRepositoryImpl):
+    """Serves active-subscription reads from a cache keyed by user id.
+
+    Users written through this repository are invalidated by a
+    SessionCacheInvalidator and read from the database until it commits.
+    """
+
+    def __init__(self, session: Session, cache: Cache):
+        super().__init__(session)
+        self.cache: Cache = cache
+        self.invalidator = SessionCacheInvalidator(session, cache)
+
+    def _load_active(self, user_id: str) -> Optional[Subscription]:
+        try:
+            return super().find_by_user_id(user_id)
+        except NoResultFound:
+            return None
+
+    def _find_active(self, user_id: str) -> Optional[Subscription]:
+        if self.invalidator.is_dirty(user_id):
+            return self._load_active(user_id)
+        cached = self.cache.get(user_id)
+        if cached is None:
+            sub = self._load_active(user_id)
+            self.cache.set(user_id, vars(sub).copy() if sub is not None else {})
+            return sub
+        return Subscription(**cached) if cached else None
+
+    def subscribe(self, subscription: Subscription):
+        self.invalidator.invalidate(subscription.user_id)
+        super().subscribe(subscription)
+
+    def unsubscribe(self, user_id: str) -> Subscription:
+        self.invalidator.invalidate(user_id)
+        return super().unsubscribe(user_id)
+
+    def has_active_user(self, user_id: str, sub_id: int = None) -> bool:
+        sub = self._find_active(user_id)
+        return sub is not None and (sub_id is None or sub.sub_id == sub_id)
+
+    def find_by_user_id(self, user_id: str) -> Subscription:
+        sub = self._find_active(user_id)
+        if sub is None:
+            raise NoResultFound
+        return sub
+
+    def find_sub_ids_by_user_ids(self, user_ids: List[str]) -> Dict[str, int]:
+        sub_ids: Dict[str, int] = {}
+        missing = []
+        for user_id in set(user_ids):
+            cached = (
+                None if self.invalidator.is_dirty(user_id) else self.cache.get(user_id)
+            )
+            if cached is None:
+                missing.append(user_id)
+            elif cached:
+                sub_ids[user_id] = cached["sub_id"]
+        if missing:
+            sub_ids.update(super().find_sub_ids_by_user_ids(missing))
+        return sub_ids
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Union
 
-from sqlalchemy import BigInteger, Boolean, Column, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, Index, Integer, String, true
 
 from app.domain.subscription.subscription import Subscription
 from app.infrastructure.database import Base
@@ -21,6 +21,16 @@ class SubscriptionDTO(Base):
     active: Union[bool, Column] = Column(Boolean, nullable=False)
     updated_at: Union[int, Column] = Column(BigInteger, nullable=False)
 
+    __table_args__ = (
+        Index(
+            "uq_subscriptions_user_id_active",
+            user_id,
+            unique=True,
+            postgresql_where=active,
+            sqlite_where=active == true(),
+        ),
+    )
+
     def to_entity(self) -> Subscription:
         return Subscription(
             id=self.id,
@@ -1,15 +1,22 @@
+from typing import Dict, List
+
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 
 from app.domain.subscription.subscription import Subscription
 from app.domain.subscription.subscription_exception import UserNotSubscribedError
 from app.domain.subscription.subscription_repository import SubscriptionRepository
+from app.infrastructure.metrics.query_metrics import label_queries
 from app.infrastructure.subscription.subscription_dto import SubscriptionDTO
 from app.usecase.subscription.subscription_command_usecase import (
     SubscriptionCommandUseCaseUnitOfWork,
 )
 
+# Keeps the bound parameters of a lookup well below SQLite's and asyncpg's limits.
+USER_IDS_PER_QUERY = 10000
+
 
+@label_queries
 class SubscriptionRepositoryImpl(SubscriptionRepository):
     def __init__(self, session: Session):
         self.session: Session = session
@@ -72,7 +79,29 @@ class SubscriptionRepositoryImpl(SubscriptionRepository):
 
         return sub_dto.to_entity()
 
+    def find_sub_ids_by_user_ids(self, user_ids: List[str]) -> Dict[str, int]:
+        subs = SubscriptionDTO.__table__
+        sub_ids: Dict[str, int] = {}
+        try:
+            for start in range(0, len(user_ids), USER_IDS_PER_QUERY):
+                rows = (
+                    self.session.query(subs.c.user_id, subs.c.sub_id)
+                    .filter(
+                        subs.c.active,
+                        subs.c.user_id.in_(
+                            user_ids[start : start + USER_IDS_PER_QUERY]
+                        ),
+                    )
+                    .all()
+                )
+                sub_ids.update((user_id, sub_id) for user_id, sub_id in rows)
+        except:
+            raise
+
+        return sub_ids
+
 
+@label_queries
 class SubscriptionCommandUseCaseUnitOfWorkImpl(SubscriptionCommandUseCaseUnitOfWork):
     def __init__(
         self,
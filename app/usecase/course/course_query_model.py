@@ -1,5 +1,4 @@
-import json
-from typing import List
+from typing import Any, List, Mapping, Optional
 
 from pydantic import BaseModel, Field
 
@@ -55,7 +54,14 @@ class CoursesListReadModel(BaseModel):
         )
 
     @staticmethod
-    def from_responses(enrolled, unenrolled):
+    def from_payloads(
+        enrolled: Optional[Mapping[str, Any]], unenrolled: Optional[Mapping[str, Any]]
+    ):
         return CoursesListReadModel(
-            enrolled=json.loads(enrolled.text), unenrolled=json.loads(unenrolled.text)
+            enrolled=PaginatedCourseReadModel(**enrolled)
+            if enrolled is not None
+            else PaginatedCourseReadModel.empty(),
+            unenrolled=PaginatedCourseReadModel(**unenrolled)
+            if unenrolled is not None
+            else PaginatedCourseReadModel.empty(),
         )
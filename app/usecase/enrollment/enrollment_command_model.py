@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.usecase.enrollment.enrollment_query_model import EnrollmentReadModel
+
+ENROLLED = "enrolled"
+ALREADY_ENROLLED = "already_enrolled"
+COURSE_NOT_FOUND = "course_not_found"
+FORBIDDEN = "forbidden"
+PAYMENT_REQUIRED = "payment_required"
+
+
+class EnrollmentCreateModel(BaseModel):
+
+    user_id: str = Field(example="h77HHmN5gU890OlSmwE5Gbv")
+    course_id: str = Field(example="oGY7u51HmoDIDbNMDIZc09V")
+
+
+class EnrollmentBatchResultModel(BaseModel):
+
+    user_id: str = Field(example="h77HHmN5gU890OlSmwE5Gbv")
+    course_id: str = Field(example="oGY7u51HmoDIDbNMDIZc09V")
+    status: str = Field(example=ENROLLED)
+    enrollment: Optional[EnrollmentReadModel]
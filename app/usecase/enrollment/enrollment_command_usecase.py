@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Optional, cast
+from typing import List, Optional, Set, Tuple, cast
 
 import shortuuid
+from sqlalchemy.exc import IntegrityError
 
 from app.domain.enrollment.enrollment import Enrollment
 from app.domain.enrollment.enrollment_exception import (
@@ -34,12 +35,26 @@ class EnrollmentCommandUseCase(ABC):
     def enroll(self, user_id: str, course_id: str) -> Optional[EnrollmentReadModel]:
         raise NotImplementedError
 
+    @abstractmethod
+    def enroll_many(
+        self, pairs: List[Tuple[str, str]]
+    ) -> List[Optional[EnrollmentReadModel]]:
+        raise NotImplementedError
+
     @abstractmethod
     def unenroll(self, user_id: str, course_id: str) -> Optional[EnrollmentReadModel]:
         raise NotImplementedError
 
     @abstractmethod
-    def unenroll_all(self, course_id: str):
+    def unenroll_all(self, course_id: str, commit: bool = True) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def commit(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def rollback(self):
         raise NotImplementedError
 
 
@@ -74,6 +89,48 @@ class EnrollmentCommandUseCaseImpl(EnrollmentCommandUseCase):
 
         return EnrollmentReadModel.from_entity(cast(Enrollment, created_enrollment))
 
+    def enroll_many(
+        self, pairs: List[Tuple[str, str]]
+    ) -> List[Optional[EnrollmentReadModel]]:
+        """Enroll each (user_id, course_id) pair that is not enrolled yet, in
+        one transaction. Results follow the order of ``pairs`` and are None
+        for pairs that were already enrolled or repeated."""
+        try:
+            enrolled: Set[
+                Tuple[str, str]
+            ] = self.uow.enrollment_repository.find_active_pairs(pairs)
+            enrollments: List[Enrollment] = []
+            positions: List[Optional[int]] = []
+            for user_id, course_id in pairs:
+                if (user_id, course_id) in enrolled:
+                    positions.append(None)
+                    continue
+                enrolled.add((user_id, course_id))
+                positions.append(len(enrollments))
+                enrollments.append(
+                    Enrollment(
+                        id=shortuuid.uuid(),
+                        user_id=user_id,
+                        course_id=course_id,
+                        active=True,
+                    )
+                )
+
+            created = self.uow.enrollment_repository.enroll_many(enrollments)
+            self.uow.commit()
+        except IntegrityError:
+            # A pair was enrolled concurrently; the whole batch can be retried.
+            self.uow.rollback()
+            raise UserAlreadyEnrolledError
+        except:
+            self.uow.rollback()
+            raise
+
+        return [
+            None if p is None else EnrollmentReadModel.from_entity(created[p])
+            for p in positions
+        ]
+
     def unenroll(self, user_id: str, course_id: str) -> Optional[EnrollmentReadModel]:
         try:
             if not self.uow.enrollment_repository.has_active_user(
@@ -91,10 +148,22 @@ class EnrollmentCommandUseCaseImpl(EnrollmentCommandUseCase):
 
         return EnrollmentReadModel.from_entity(cast(Enrollment, enrollment))
 
-    def unenroll_all(self, course_id: str):
+    def unenroll_all(self, course_id: str, commit: bool = True) -> List[str]:
+        """Deactivate every active enrollment of a course. With ``commit``
+        false the transaction is left open, for the caller to commit or roll
+        back once the work that depends on it has succeeded."""
         try:
-            self.uow.enrollment_repository.unenroll_all(course_id=course_id)
-            self.uow.commit()
+            user_ids = self.uow.enrollment_repository.unenroll_all(course_id=course_id)
+            if commit:
+                self.uow.commit()
         except:
             self.uow.rollback()
             raise
+
+        return user_ids
+
+    def commit(self):
+        self.uow.commit()
+
+    def rollback(self):
+        self.uow.rollback()
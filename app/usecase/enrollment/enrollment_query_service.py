@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 
 from ..metrics.enrollment_metrics_query_model import EnrollmentMetricsReadModel
 from .enrollment_query_model import EnrollmentReadModel
@@ -10,10 +10,34 @@ class EnrollmentQueryService(ABC):
     def fetch_enrollments_from_course(self, id: str) -> List[EnrollmentReadModel]:
         raise NotImplementedError
 
+    @abstractmethod
+    def fetch_user_ids_from_course(
+        self,
+        id: str,
+        only_active: bool,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_enrollments(
+        self, course_id: Optional[str], only_active: bool, batch_size: int
+    ) -> Generator[List[tuple], None, None]:
+        raise NotImplementedError
+
     @abstractmethod
     def fetch_enrollments_from_user(self, id: str) -> List[EnrollmentReadModel]:
         raise NotImplementedError
 
+    @abstractmethod
+    def fetch_courses_from_user(self, id: str) -> Dict[str, bool]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_active_users_by_sub_id(self, id: str) -> Dict[int, int]:
+        raise NotImplementedError
+
     @abstractmethod
     def get_enrollment_metrics(
         self,
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 
 from ...domain.user.user_exception import (
     NoStudentsInCourseError,
@@ -11,13 +11,29 @@ from .enrollment_query_service import EnrollmentQueryService
 
 class EnrollmentQueryUseCase(ABC):
     @abstractmethod
-    def fetch_users_from_course(self, id: str, only_active: bool) -> List[str]:
+    def fetch_users_from_course(
+        self,
+        id: str,
+        only_active: bool,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_enrollments(
+        self, course_id: Optional[str], only_active: bool, batch_size: int
+    ) -> Generator[List[tuple], None, None]:
         raise NotImplementedError
 
     @abstractmethod
     def fetch_courses_from_user(self, id: str) -> dict:
         raise NotImplementedError
 
+    @abstractmethod
+    def count_students_by_sub_type(self, id: str) -> Dict[int, int]:
+        raise NotImplementedError
+
     @abstractmethod
     def get_enrollment_metrics(
         self,
@@ -32,48 +48,54 @@ class EnrollmentQueryUseCaseImpl(EnrollmentQueryUseCase):
     def __init__(self, enrollment_query_service: EnrollmentQueryService):
         self.enrollment_query_service: EnrollmentQueryService = enrollment_query_service
 
-    def fetch_users_from_course(self, id: str, only_active: bool) -> List[str]:
+    def fetch_users_from_course(
+        self,
+        id: str,
+        only_active: bool,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> List[str]:
         try:
-            enrollments = self.enrollment_query_service.fetch_enrollments_from_course(
-                id
+            user_ids = self.enrollment_query_service.fetch_user_ids_from_course(
+                id, only_active, limit=limit, after=after
             )
-            if only_active:
-                enrollments = list(filter(lambda enr: enr.is_active(), enrollments))
-            if len(enrollments) == 0:
+            if len(user_ids) == 0:
                 raise NoStudentsInCourseError
-            r = list(map(lambda enr: enr.get_user_id(), enrollments))
 
         except:
             raise
 
-        return r
+        return user_ids
+
+    def stream_enrollments(
+        self, course_id: Optional[str], only_active: bool, batch_size: int
+    ) -> Generator[List[tuple], None, None]:
+        return self.enrollment_query_service.stream_enrollments(
+            course_id, only_active, batch_size
+        )
 
     def fetch_courses_from_user(self, id: str) -> dict:
         try:
-            enrollments = self.enrollment_query_service.fetch_enrollments_from_user(id)
-            enrolled = list(filter(lambda enr: enr.is_active(), enrollments))
-            unenrolled = list(
-                filter(
-                    lambda enr: not enr.is_active() and enr not in enrolled, enrollments
-                )
-            )
-
-            enr_list = {
-                "enrolled": list(map(lambda enr: enr.get_course_id(), enrolled)),
-                "unenrolled": list(map(lambda enr: enr.get_course_id(), unenrolled)),
-            }
-            enr_list["unenrolled"] = list(
-                filter(lambda e: e not in enr_list["enrolled"], enr_list["unenrolled"])
-            )
-
-            if len(enrollments) == 0:
+            courses = self.enrollment_query_service.fetch_courses_from_user(id)
+            if len(courses) == 0:
                 raise StudentNotEnrolledError
 
+            enr_list: Dict[str, List[str]] = {"enrolled": [], "unenrolled": []}
+            for course_id, enrolled in courses.items():
+                enr_list["enrolled" if enrolled else "unenrolled"].append(course_id)
+
         except:
             raise
 
         return enr_list
 
+    def count_students_by_sub_type(self, id: str) -> Dict[int, int]:
+        counts = self.enrollment_query_service.count_active_users_by_sub_id(id)
+        if len(counts) == 0:
+            raise NoStudentsInCourseError
+
+        return counts
+
     def get_enrollment_metrics(
         self,
         limit: int,
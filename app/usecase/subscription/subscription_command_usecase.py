@@ -1,6 +1,6 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import cast
+from typing import Dict, List, cast
 
 import shortuuid
 from sqlalchemy.exc import NoResultFound
@@ -51,6 +51,19 @@ class SubscriptionCommandUseCase(ABC):
     def user_sub_type(self, user_id: str):
         raise NotImplementedError
 
+    @abstractmethod
+    def users_sub_types(self, user_ids: List[str]) -> Dict[str, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def subscribed_sub_types(self, user_ids: List[str]) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+def has_enr_permission(course_sub_id: int, user_sub_id: int) -> bool:
+    """Courses+ need a paid subscription."""
+    return course_sub_id < 1 or user_sub_id >= 1
+
 
 class SubscriptionCommandUseCaseImpl(SubscriptionCommandUseCase):
     def __init__(
@@ -98,7 +111,7 @@ class SubscriptionCommandUseCaseImpl(SubscriptionCommandUseCase):
     def check_enr_permission(self, sub_id: int, user_id: str):
         try:
             s = self.uow.subscription_repository.find_by_user_id(user_id)
-            if sub_id >= 1 and s.sub_id < 1:
+            if not has_enr_permission(sub_id, s.sub_id):
                 raise NoEnrollmentPermissionError
 
         except NoResultFound:
@@ -111,3 +124,14 @@ class SubscriptionCommandUseCaseImpl(SubscriptionCommandUseCase):
             raise UserNotSubscribedError
 
         return s.sub_id
+
+    def users_sub_types(self, user_ids: List[str]) -> Dict[str, int]:
+        sub_ids = self.uow.subscription_repository.find_sub_ids_by_user_ids(user_ids)
+        if len(sub_ids) != len(set(user_ids)):
+            raise UserNotSubscribedError
+
+        return sub_ids
+
+    def subscribed_sub_types(self, user_ids: List[str]) -> Dict[str, int]:
+        """Subscription types of the users that have an active subscription."""
+        return self.uow.subscription_repository.find_sub_ids_by_user_ids(user_ids)
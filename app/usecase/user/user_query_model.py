@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -18,3 +18,21 @@ class UserReadModel(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class PaginatedUserReadModel(BaseModel):
+    users: List[UserReadModel] = Field(example=[UserReadModel.schema()])
+    next: Optional[str] = Field(example="aDc3N0hIbU41Z1U4OTBPbFNtd0U1R2J2")
+
+    @staticmethod
+    def empty():
+        return PaginatedUserReadModel(users=[], next=None)
+
+
+class PaginatedUserIdReadModel(BaseModel):
+    users: List[str] = Field(example=["h77HHmN5gU890OlSmwE5Gbv"])
+    next: Optional[str] = Field(example="aDc3N0hIbU41Z1U4OTBPbFNtd0U1R2J2")
+
+    @staticmethod
+    def empty():
+        return PaginatedUserIdReadModel(users=[], next=None)
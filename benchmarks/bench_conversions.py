@@ -0,0 +1,207 @@
+"""Cost of the per-row conversions between ORM rows, entities, read models and
+response bodies.
+
+    python -m benchmarks.bench_conversions --rows 10000 --output conversions.json
+    python -m benchmarks.bench_conversions --baseline conversions.json
+
+DTOs are loaded from an in-memory SQLite database first, so only the
+conversions themselves are timed. Each case reports the best of --repeat
+runs per row and per 10k rows. --output writes them as JSON together with the
+library versions; --baseline prints the change against such a file.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import time
+from typing import Callable, Dict, List, Optional
+
+import fastapi
+import pydantic
+import sqlalchemy
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.enrollment.enrollment import Enrollment
+from app.domain.subscription.subscription import Subscription
+from app.infrastructure.database import Base
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+from app.infrastructure.subscription.subscription_dto import SubscriptionDTO
+from app.usecase.enrollment.enrollment_query_model import EnrollmentReadModel
+from app.usecase.metrics.enrollment_metrics_query_model import (
+    EnrollmentMetricsReadModel,
+    LimitedEnrollmentMetricsReadModel,
+)
+from app.usecase.user.user_query_model import UserReadModel
+
+
+def load_dtos(rows: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(
+            EnrollmentDTO.__table__.insert(),
+            [
+                dict(
+                    id=f"enr_{i}",
+                    user_id=f"user_{i}",
+                    course_id=f"course_{i % 100}",
+                    active=True,
+                    updated_at=i,
+                )
+                for i in range(rows)
+            ],
+        )
+        connection.execute(
+            SubscriptionDTO.__table__.insert(),
+            [
+                dict(
+                    id=f"sub_{i}",
+                    user_id=f"user_{i}",
+                    sub_id=i % 3,
+                    active=True,
+                    updated_at=i,
+                )
+                for i in range(rows)
+            ],
+        )
+    session = sessionmaker(bind=engine)()
+    return session.query(EnrollmentDTO).all(), session.query(SubscriptionDTO).all()
+
+
+def user(i: int) -> dict:
+    return {
+        "id": f"user_{i}",
+        "username": f"user{i}",
+        "name": "Jane",
+        "lastName": "Doe",
+        "role": 1,
+        "dateOfBirth": "Wed Nov 10 2021",
+        "country": "Argentina",
+        "language": "Spanish",
+        "mail": f"user{i}@example.com",
+        "favouriteCourses": ["course_1", "course_2"],
+    }
+
+
+def serializer(type_) -> Callable:
+    field = create_response_field(name="response", type_=type_)
+    loop = asyncio.new_event_loop()
+
+    def serialize(content):
+        body = loop.run_until_complete(
+            serialize_response(field=field, response_content=content)
+        )
+        return JSONResponse(body).body
+
+    return serialize
+
+
+def cases(rows: int, metrics: int) -> Dict[str, Callable[[], object]]:
+    enr_dtos, sub_dtos = load_dtos(rows)
+    enrollments = [dto.to_entity() for dto in enr_dtos]
+    users = [UserReadModel(**user(i)) for i in range(rows)]
+    user_ids = [f"user_{i}" for i in range(rows)]
+    courses = {
+        "courses": [
+            {"id": f"course_{i}", "name": f"Course {i}"} for i in range(metrics)
+        ]
+    }
+    metric_rows = [
+        EnrollmentMetricsReadModel(course_id=f"course_{i}", count=i)
+        for i in range(metrics)
+    ]
+    serialize_users = serializer(List[UserReadModel])
+    serialize_ids = serializer(List[str])
+
+    return {
+        "Enrollment()": lambda: [
+            Enrollment(id=e.id, user_id=e.user_id, course_id=e.course_id, active=True)
+            for e in enrollments
+        ],
+        "Subscription()": lambda: [
+            Subscription(id=s.id, user_id=s.user_id, sub_id=s.sub_id, active=True)
+            for s in sub_dtos
+        ],
+        "EnrollmentDTO.to_entity": lambda: [dto.to_entity() for dto in enr_dtos],
+        "EnrollmentDTO.to_read_model": lambda: [
+            dto.to_read_model() for dto in enr_dtos
+        ],
+        "SubscriptionDTO.to_read_model": lambda: [
+            dto.to_read_model() for dto in sub_dtos
+        ],
+        "EnrollmentReadModel.from_entity": lambda: [
+            EnrollmentReadModel.from_entity(e) for e in enrollments
+        ],
+        f"from_lists x{metrics}": lambda: LimitedEnrollmentMetricsReadModel.from_lists(
+            courses, metric_rows, metrics
+        ),
+        "serialize List[UserReadModel]": lambda: serialize_users(users),
+        "serialize List[str]": lambda: serialize_ids(user_ids),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--metrics", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of this file")
+    args = parser.parse_args()
+
+    baseline: Optional[Dict[str, dict]] = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'case':34} {'per row':>10} {'per 10k':>10}")
+    for name, fn in cases(args.rows, args.metrics).items():
+        rows = args.metrics if name.startswith("from_lists") else args.rows
+        seconds = measure(fn, args.repeat)
+        results[name] = {
+            "rows": rows,
+            "us_per_row": seconds / rows * 1e6,
+            "ms_per_10k": seconds / rows * 1e4 * 1e3,
+        }
+        line = f"{name:34} {results[name]['us_per_row']:8.3f}us {results[name]['ms_per_10k']:8.2f}ms"
+        if baseline and name in baseline:
+            before = baseline[name]["us_per_row"]
+            line += f"  {(results[name]['us_per_row'] - before) / before * 100:+.1f}%"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "python": platform.python_version(),
+                        "machine": platform.machine(),
+                        "fastapi": fastapi.__version__,
+                        "pydantic": pydantic.VERSION,
+                        "sqlalchemy": sqlalchemy.__version__,
+                        "rows": args.rows,
+                        "repeat": args.repeat,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Hot path cost of the instrumentation behind /metrics.
+
+    python -m benchmarks.bench_metrics --iterations 200000
+
+Each line prints the best of five runs per call with and without
+instrumentation and the overhead it adds. Everything runs in process; no database server or network
+is involved.
+"""
+import argparse
+import asyncio
+import time
+
+from app.infrastructure.metrics.query_metrics import label_queries
+from app.infrastructure.metrics.registry import Registry
+from app.infrastructure.metrics.request_metrics import RequestMetricsMiddleware
+
+REPEAT = 5
+
+
+def per_call(fn, iterations: int) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations
+
+
+def per_request(app, iterations: int) -> float:
+    async def endpoint():
+        pass
+
+    class Router:
+        routes = []
+
+    class App:
+        router = Router()
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            scope = {"type": "http", "method": "GET", "app": App()}
+            await app(scope, receive, send)
+        return time.perf_counter() - start
+
+    return min(asyncio.run(run()) for _ in range(REPEAT)) / iterations
+
+
+async def asgi_app(scope, receive, send):
+    scope["endpoint"] = asgi_app
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class Repository:
+    def find(self):
+        return None
+
+
+@label_queries
+class LabelledRepository(Repository):
+    def find(self):
+        return None
+
+
+def report(name: str, plain: float, instrumented: float):
+    print(
+        f"{name:28} {plain * 1e6:9.3f} us  {instrumented * 1e6:9.3f} us"
+        f"  +{(instrumented - plain) * 1e6:7.3f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    registry = Registry()
+    histogram = registry.histogram("h", "Histogram.", ("route",))
+    counter = registry.counter("c", "Counter.", ("route", "status"))
+    child = histogram.labels("/subscriptions/{user_id}")
+
+    print(f"{'':28} {'plain':>12}  {'instrumented':>12}  overhead")
+    report(
+        "histogram observe",
+        per_call(lambda: None, n),
+        per_call(lambda: child.observe(0.01), n),
+    )
+    report(
+        "histogram labels + observe",
+        per_call(lambda: None, n),
+        per_call(lambda: histogram.labels("/subscriptions/{user_id}").observe(0.01), n),
+    )
+    report(
+        "counter labels + inc",
+        per_call(lambda: None, n),
+        per_call(lambda: counter.labels("/subscriptions", "200").inc(), n),
+    )
+    report(
+        "ASGI request",
+        per_request(asgi_app, n // 10),
+        per_request(RequestMetricsMiddleware(asgi_app), n // 10),
+    )
+
+    report(
+        "repository method",
+        per_call(Repository().find, n),
+        per_call(LabelledRepository().find, n),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Drive the service with a scenario mix and report throughput and latency
+percentiles per scenario.
+
+    python -m benchmarks.loadtest.run --url http://127.0.0.1:8000 \\
+        --mix default --concurrency 64 --duration 60 --output run.json
+    python -m benchmarks.loadtest.run --mix default --baseline run.json
+
+The service should run against a database filled by
+``benchmarks.loadtest.seed`` (pass it the same --users and --courses) and
+microservices served by ``benchmarks.loadtest.stubs``. Requests made during
+the --warmup seconds are not reported. With --baseline the report also
+shows the change in throughput and p99 latency against that earlier run.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.loadtest.scenarios import MIXES, SCENARIOS, Population
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(p / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, scenario: str, status: str, seconds: float):
+        self.latencies[scenario].append(seconds)
+        self.statuses[scenario][status] += 1
+
+    def summary(self, seconds: float) -> Dict[str, dict]:
+        scenarios = {}
+        everything: List[float] = []
+        for scenario, latencies in sorted(self.latencies.items()):
+            everything.extend(latencies)
+            scenarios[scenario] = self._summarize(
+                latencies, dict(self.statuses[scenario]), seconds
+            )
+        statuses: Dict[str, int] = defaultdict(int)
+        for counts in self.statuses.values():
+            for status, n in counts.items():
+                statuses[status] += n
+        scenarios["total"] = self._summarize(everything, dict(statuses), seconds)
+        return scenarios
+
+    @staticmethod
+    def _summarize(latencies: List[float], statuses: Dict[str, int], seconds):
+        ordered = sorted(latencies)
+        failed = sum(
+            n for s, n in statuses.items() if not s.isdigit() or s.startswith("5")
+        )
+        summary = {
+            "requests": len(ordered),
+            "rps": len(ordered) / seconds,
+            "failed": failed,
+            "statuses": statuses,
+            "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+        }
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = percentile(ordered, p) * 1000
+        return summary
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    rnd: random.Random,
+    ids: Population,
+    names: List[str],
+    weights: List[int],
+    measure_from: float,
+    deadline: float,
+    results: Results,
+):
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            return
+        scenario = rnd.choices(names, weights)[0]
+        call = SCENARIOS[scenario](rnd, ids)
+        start = time.perf_counter()
+        try:
+            r = await client.request(call.method, call.path, params=call.params)
+            status = str(r.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if start >= measure_from:
+            results.record(scenario, status, time.perf_counter() - start)
+
+
+async def run(args) -> Dict[str, dict]:
+    mix = MIXES[args.mix]
+    names, weights = list(mix), list(mix.values())
+    ids = Population(args.users, args.courses, uuid.uuid4().hex[:8])
+    results = Results()
+    limits = httpx.Limits(max_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=timeout
+    ) as client:
+        start = time.perf_counter()
+        measure_from = start + args.warmup
+        deadline = measure_from + args.duration
+        await asyncio.gather(
+            *(
+                worker(
+                    client,
+                    random.Random(args.seed * 100003 + i),
+                    ids,
+                    names,
+                    weights,
+                    measure_from,
+                    deadline,
+                    results,
+                )
+                for i in range(args.concurrency)
+            )
+        )
+        measured = time.perf_counter() - measure_from
+    return results.summary(measured)
+
+
+def print_report(summary: Dict[str, dict], baseline: Optional[Dict[str, dict]]):
+    header = f"{'scenario':18} {'requests':>9} {'rps':>9} {'failed':>7}"
+    header += "".join(f" {f'p{p} ms':>9}" for p in PERCENTILES) + f" {'max ms':>9}"
+    if baseline:
+        header += f" {'rps vs base':>12} {'p99 vs base':>12}"
+    print(header)
+    for scenario, s in summary.items():
+        line = f"{scenario:18} {s['requests']:9d} {s['rps']:9.1f} {s['failed']:7d}"
+        line += "".join(f" {s[f'p{p}_ms']:9.1f}" for p in PERCENTILES)
+        line += f" {s['max_ms']:9.1f}"
+        base = (baseline or {}).get(scenario)
+        if base:
+            line += f" {change(s['rps'], base['rps']):>12}"
+            line += f" {change(s['p99_ms'], base['p99_ms']):>12}"
+        print(line)
+
+
+def change(value: float, base: float) -> str:
+    if base == 0:
+        return "n/a"
+    return f"{(value - base) / base * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--courses", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of this file")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    print_report(summary, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import itertools
+import random
+from typing import Callable, Dict, NamedTuple, Optional
+
+
+class Call(NamedTuple):
+    method: str
+    path: str
+    params: Optional[dict] = None
+
+
+class Population:
+    """Ids of the rows written by ``benchmarks.loadtest.seed``."""
+
+    def __init__(self, users: int, courses: int, run_id: str):
+        self.users: int = users
+        self.courses: int = courses
+        self.new_users = (f"load_{run_id}_{n}" for n in itertools.count())
+
+    def user(self, rnd: random.Random) -> str:
+        return f"user_{rnd.randrange(self.users)}"
+
+    def course(self, rnd: random.Random) -> str:
+        # Popular courses are picked more often, as in the seeded data.
+        return f"course_{int(self.courses * rnd.random() ** 2)}"
+
+
+Scenario = Callable[[random.Random, Population], Call]
+
+
+def subscribe(rnd: random.Random, ids: Population) -> Call:
+    return Call("POST", "/subscriptions", {"user_id": next(ids.new_users), "sub_id": 0})
+
+
+def get_subscription(rnd: random.Random, ids: Population) -> Call:
+    return Call("GET", f"/subscriptions/{ids.user(rnd)}")
+
+
+def enroll(rnd: random.Random, ids: Population) -> Call:
+    return Call(
+        "POST",
+        f"/subscriptions/{ids.course(rnd)}/enrollments",
+        {"user_id": ids.user(rnd)},
+    )
+
+
+def cancel_fee(rnd: random.Random, ids: Population) -> Call:
+    return Call(
+        "GET",
+        f"/subscriptions/{ids.course(rnd)}/enrollments/cancel-fee",
+        {"price": 10, "sub_id": rnd.randrange(3)},
+    )
+
+
+def cancel_course(rnd: random.Random, ids: Population) -> Call:
+    course_id = ids.course(rnd)
+    return Call(
+        "PATCH",
+        f"/subscriptions/{course_id}/enrollments",
+        {
+            "course_name": "Load test course",
+            "creator_id": "creator_0",
+            "price": 10,
+            "sub_id": 0,
+        },
+    )
+
+
+def users_enrolled(rnd: random.Random, ids: Population) -> Call:
+    return Call("GET", f"/subscriptions/{ids.course(rnd)}/enrollments/course/id-only")
+
+
+def courses_enrolled(rnd: random.Random, ids: Population) -> Call:
+    return Call("GET", f"/subscriptions/{ids.user(rnd)}/enrollments/user")
+
+
+def metrics(rnd: random.Random, ids: Population) -> Call:
+    return Call("GET", "/subscriptions/metrics/", {"limit": 10})
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "subscribe": subscribe,
+    "get_subscription": get_subscription,
+    "enroll": enroll,
+    "cancel_fee": cancel_fee,
+    "cancel_course": cancel_course,
+    "users_enrolled": users_enrolled,
+    "courses_enrolled": courses_enrolled,
+    "metrics": metrics,
+}
+
+MIXES: Dict[str, Dict[str, int]] = {
+    "default": {
+        "subscribe": 10,
+        "get_subscription": 20,
+        "enroll": 15,
+        "cancel_fee": 10,
+        "cancel_course": 1,
+        "users_enrolled": 15,
+        "courses_enrolled": 20,
+        "metrics": 9,
+    },
+    "read": {
+        "get_subscription": 30,
+        "users_enrolled": 25,
+        "courses_enrolled": 30,
+        "metrics": 15,
+    },
+    "write": {
+        "subscribe": 40,
+        "enroll": 55,
+        "cancel_course": 5,
+    },
+}
+
+MIXES.update({name: {name: 1} for name in SCENARIOS})
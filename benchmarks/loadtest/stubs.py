@@ -0,0 +1,157 @@
+"""Local stand-ins for the courses, users, payments and notifications
+microservices, with injectable latency and errors.
+
+    python -m benchmarks.loadtest.stubs --port 9000 \\
+        --latency courses=0.02 --latency payments=0.1 --error-rate payments=0.01
+
+All four services are served from the same base URL, so the service under
+test is pointed at them with
+
+    MICROSERVICES="{'courses': 'http://127.0.0.1:9000/', \\
+        'users': 'http://127.0.0.1:9000/', \\
+        'payments': 'http://127.0.0.1:9000/', \\
+        'notifications': 'http://127.0.0.1:9000/'}"
+
+Courses and users are generated from their ids, so any id from the seeded
+database resolves to the same payload on every run.
+"""
+import argparse
+import asyncio
+import random
+import zlib
+from typing import Dict, List
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+SERVICES = ("courses", "users", "payments", "notifications")
+
+
+def _number(id: str) -> int:
+    suffix = id.rsplit("_", 1)[-1]
+    return int(suffix) if suffix.isdigit() else zlib.crc32(id.encode())
+
+
+def course(cid: str) -> dict:
+    n = _number(cid)
+    return {
+        "id": cid,
+        "creator_id": f"creator_{n % 1000}",
+        "name": f"Course {n}",
+        "price": n % 4 * 5,
+        "subscription_id": n % 3,
+        "active": True,
+        "language": "English",
+        "country": "Argentina",
+        "description": "Load test course",
+        "categories": ["Programming"],
+        "recommendations": {"recommended": n % 100, "total": 100},
+        "presentation_video": "https://example.com/video",
+        "image": "https://example.com/image.png",
+        "created_at": 1136214245000,
+        "updated_at": 1136214245000,
+    }
+
+
+def user(uid: str) -> dict:
+    n = _number(uid)
+    return {
+        "id": uid,
+        "username": f"user{n}",
+        "name": "Jane",
+        "lastName": "Doe",
+        "role": 1,
+        "dateOfBirth": "Wed Nov 10 2021",
+        "country": "Argentina",
+        "language": "Spanish",
+        "mail": f"user{n}@example.com",
+        "favouriteCourses": [],
+    }
+
+
+class Faults:
+    """Latency (seconds, with +-25% jitter) and error rate per service."""
+
+    def __init__(self, latency: Dict[str, float], error_rate: Dict[str, float]):
+        self.latency: Dict[str, float] = latency
+        self.error_rate: Dict[str, float] = error_rate
+        self.random = random.Random(0)
+
+    async def inject(self, service: str):
+        latency = self.latency.get(service, 0.0)
+        if latency > 0:
+            await asyncio.sleep(latency * self.random.uniform(0.75, 1.25))
+        if self.random.random() < self.error_rate.get(service, 0.0):
+            return JSONResponse({"detail": "Injected failure"}, status_code=503)
+        return None
+
+
+def create_app(faults: Faults) -> Starlette:
+    async def get_courses(request: Request):
+        failure = await faults.inject("courses")
+        if failure is not None:
+            return failure
+        ids: List[str] = request.query_params.getlist("ids")
+        return JSONResponse(
+            {"courses": [course(cid) for cid in ids], "count": len(ids)}
+        )
+
+    async def filter_users(request: Request):
+        failure = await faults.inject("users")
+        if failure is not None:
+            return failure
+        ids = [i for i in request.query_params.get("ids", "").split(",") if i]
+        return JSONResponse([user(uid) for uid in ids])
+
+    async def payments(request: Request):
+        failure = await faults.inject("payments")
+        return failure if failure is not None else JSONResponse({"status": "ok"})
+
+    async def notifications(request: Request):
+        failure = await faults.inject("notifications")
+        return failure if failure is not None else JSONResponse({"status": "ok"})
+
+    return Starlette(
+        routes=[
+            Route("/courses/", get_courses, methods=["GET"]),
+            Route("/users/filter-by-ids", filter_users, methods=["GET"]),
+            Route("/payments/deposit", payments, methods=["POST"]),
+            Route("/payments/pay", payments, methods=["POST"]),
+            Route(
+                "/notifications/course-state-change", notifications, methods=["POST"]
+            ),
+            Route("/notifications/error-report", notifications, methods=["POST"]),
+        ]
+    )
+
+
+def per_service(values: List[str]) -> Dict[str, float]:
+    settings: Dict[str, float] = {}
+    for value in values:
+        service, _, amount = value.partition("=")
+        if service not in SERVICES:
+            raise argparse.ArgumentTypeError(f"Unknown service {service}")
+        settings[service] = float(amount)
+    return settings
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", action="append", default=[], metavar="SVC=SEC")
+    parser.add_argument("--error-rate", action="append", default=[], metavar="SVC=RATE")
+    args = parser.parse_args()
+
+    faults = Faults(per_service(args.latency), per_service(args.error_rate))
+    base = f"http://{args.host}:{args.port}/"
+    print("MICROSERVICES=" + repr({service: base for service in SERVICES}))
+    uvicorn.run(create_app(faults), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
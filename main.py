@@ -1,17 +1,30 @@
-import ast
+import asyncio
+import base64
+import binascii
 import json
 import logging
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 from logging import config
-from typing import Iterator, List
+from typing import (
+    AsyncIterator,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypedDict,
+)
 
-import requests
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm.session import Session
 from starlette.requests import Request
 
-from app.domain.course import CourseNotFoundError
+from app.domain.course import CourseNotFoundError, CoursesNotFoundError
 from app.domain.enrollment.enrollment_exception import (
     NoEnrollmentPermissionError,
     UserAlreadyEnrolledError,
@@ -29,7 +42,29 @@ from app.domain.user.user_exception import (
     NoStudentsInCourseError,
     StudentNotEnrolledError,
 )
-from app.infrastructure.database import SessionLocal, create_tables
+from app.infrastructure.cache.cache_factory import create_cache
+from app.infrastructure.cache.stale_while_revalidate_cache import (
+    StaleWhileRevalidateCache,
+)
+from app.infrastructure.course.course_metadata_cache import CourseMetadataCache
+from app.infrastructure.database import (
+    DATABASE_ASYNC,
+    DATABASE_QUERY_STATS,
+    AsyncSessionLocal,
+    SessionLocal,
+    async_engine,
+    create_tables,
+    db_executor,
+    run_db,
+    use_async_session,
+)
+from app.infrastructure.db_executor import ExecutorSaturatedError
+from app.infrastructure.enrollment.cached_enrollment_query_service import (
+    CachedEnrollmentQueryServiceImpl,
+)
+from app.infrastructure.enrollment.cached_enrollment_repository import (
+    CachedEnrollmentRepositoryImpl,
+)
 from app.infrastructure.enrollment.enrollment_query_service import (
     EnrollmentQueryServiceImpl,
 )
@@ -37,6 +72,19 @@ from app.infrastructure.enrollment.enrollment_repository import (
     EnrollmentCommandUseCaseUnitOfWorkImpl,
     EnrollmentRepositoryImpl,
 )
+from app.infrastructure.metrics.cache_metrics import register_cache
+from app.infrastructure.metrics.query_stats import QueryStatsMiddleware
+from app.infrastructure.metrics.registry import CONTENT_TYPE, registry
+from app.infrastructure.metrics.request_metrics import RequestMetricsMiddleware
+from app.infrastructure.microservices import (
+    MicroserviceClients,
+    load_microservices,
+    load_pool_settings,
+)
+from app.infrastructure.pool_metrics import pool_metrics
+from app.infrastructure.subscription.cached_subscription_repository import (
+    CachedSubscriptionRepositoryImpl,
+)
 from app.infrastructure.subscription.subscription_query_service import (
     SubscriptionQueryServiceImpl,
 )
@@ -60,6 +108,15 @@ from app.presentation.schema.user.user_error_message import (
     ErrorMessageInvalidCredentials,
 )
 from app.usecase.course.course_query_model import CoursesListReadModel
+from app.usecase.enrollment.enrollment_command_model import (
+    ALREADY_ENROLLED,
+    COURSE_NOT_FOUND,
+    ENROLLED,
+    FORBIDDEN,
+    PAYMENT_REQUIRED,
+    EnrollmentBatchResultModel,
+    EnrollmentCreateModel,
+)
 from app.usecase.enrollment.enrollment_command_usecase import (
     EnrollmentCommandUseCase,
     EnrollmentCommandUseCaseImpl,
@@ -78,6 +135,7 @@ from app.usecase.subscription.subscription_command_usecase import (
     SubscriptionCommandUseCase,
     SubscriptionCommandUseCaseImpl,
     SubscriptionCommandUseCaseUnitOfWork,
+    has_enr_permission,
 )
 from app.usecase.subscription.subscription_query_model import (
     SubscriptionReadModel,
@@ -88,16 +146,63 @@ from app.usecase.subscription.subscription_query_usecase import (
     SubscriptionQueryUseCase,
     SubscriptionQueryUseCaseImpl,
 )
-from app.usecase.user.user_query_model import UserReadModel
+from app.usecase.user.user_query_model import (
+    PaginatedUserIdReadModel,
+    PaginatedUserReadModel,
+    UserReadModel,
+)
 
 config.fileConfig("logging.conf", disable_existing_loggers=False)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="subscriptions")
+app.add_middleware(RequestMetricsMiddleware)
+if DATABASE_QUERY_STATS:
+    app.add_middleware(QueryStatsMiddleware)
 create_tables()
 
 
-def get_session() -> Iterator[Session]:
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated(request: Request, e: ExecutorSaturatedError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": e.message},
+    )
+
+
+subscription_cache = register_cache(
+    "subscriptions",
+    create_cache(
+        "subscriptions",
+        maxsize=int(os.environ.get("SUBSCRIPTION_CACHE_SIZE", 10000)),
+        ttl=float(os.environ.get("SUBSCRIPTION_CACHE_TTL", 30)),
+    ),
+)
+enrollment_cache = register_cache(
+    "enrollments",
+    create_cache(
+        "enrollment-courses",
+        maxsize=int(os.environ.get("ENROLLMENT_CACHE_SIZE", 10000)),
+        ttl=float(os.environ.get("ENROLLMENT_CACHE_TTL", 30)),
+    ),
+)
+METRICS_CACHE_SNAP = float(os.environ.get("METRICS_CACHE_SNAP", 60))
+metrics_cache = StaleWhileRevalidateCache(
+    max_stale=float(os.environ.get("METRICS_CACHE_STALE", 300)),
+    max_writes=int(os.environ.get("METRICS_CACHE_WRITES", 100)),
+    maxsize=int(os.environ.get("METRICS_CACHE_SIZE", 1000)),
+)
+
+
+@app.on_event("shutdown")
+def close_caches():
+    subscription_cache.close()
+    enrollment_cache.close()
+    course_cache.cache.close()
+    metrics_cache.close()
+
+
+def get_sync_session() -> Iterator[Session]:
     session: Session = SessionLocal()
     try:
         yield session
@@ -105,6 +210,35 @@ def get_session() -> Iterator[Session]:
         session.close()
 
 
+async def get_async_session() -> AsyncIterator[Session]:
+    assert AsyncSessionLocal is not None
+    async with AsyncSessionLocal() as session:
+        yield use_async_session(session)
+
+
+get_session = get_async_session if DATABASE_ASYNC else get_sync_session
+
+
+@asynccontextmanager
+async def open_session() -> AsyncIterator[Session]:
+    """A session for work that may outlive the request, such as background
+    cache refreshes."""
+    if DATABASE_ASYNC:
+        assert AsyncSessionLocal is not None
+        async with AsyncSessionLocal() as session:
+            yield use_async_session(session)
+    else:
+        with SessionLocal() as session:
+            yield session
+
+
+@app.on_event("shutdown")
+async def close_database():
+    if async_engine is not None:
+        await async_engine.dispose()
+    db_executor.shutdown()
+
+
 def subscription_query_usecase(
     session: Session = Depends(get_session),
 ) -> SubscriptionQueryUseCase:
@@ -117,9 +251,13 @@ def subscription_query_usecase(
 def subscription_command_usecase(
     session: Session = Depends(get_session),
 ) -> SubscriptionCommandUseCase:
-    subscription_repository: SubscriptionRepository = SubscriptionRepositoryImpl(
-        session
-    )
+    subscription_repository: SubscriptionRepository
+    if subscription_cache.ttl > 0:
+        subscription_repository = CachedSubscriptionRepositoryImpl(
+            session, subscription_cache
+        )
+    else:
+        subscription_repository = SubscriptionRepositoryImpl(session)
     uow: SubscriptionCommandUseCaseUnitOfWork = (
         SubscriptionCommandUseCaseUnitOfWorkImpl(
             session, subscription_repository=subscription_repository
@@ -131,38 +269,117 @@ def subscription_command_usecase(
 def enrollment_query_usecase(
     session: Session = Depends(get_session),
 ) -> EnrollmentQueryUseCase:
-    enrollment_query_service: EnrollmentQueryService = EnrollmentQueryServiceImpl(
-        session
-    )
+    enrollment_query_service: EnrollmentQueryService
+    if enrollment_cache.ttl > 0:
+        enrollment_query_service = CachedEnrollmentQueryServiceImpl(
+            session, enrollment_cache
+        )
+    else:
+        enrollment_query_service = EnrollmentQueryServiceImpl(session)
     return EnrollmentQueryUseCaseImpl(enrollment_query_service)
 
 
 def enrollment_command_usecase(
     session: Session = Depends(get_session),
 ) -> EnrollmentCommandUseCase:
-    enrollment_repository: EnrollmentRepository = EnrollmentRepositoryImpl(session)
+    enrollment_repository: EnrollmentRepository
+    if enrollment_cache.ttl > 0:
+        enrollment_repository = CachedEnrollmentRepositoryImpl(
+            session, enrollment_cache
+        )
+    else:
+        enrollment_repository = EnrollmentRepositoryImpl(session)
     uow: EnrollmentCommandUseCaseUnitOfWork = EnrollmentCommandUseCaseUnitOfWorkImpl(
         session, enrollment_repository=enrollment_repository
     )
     return EnrollmentCommandUseCaseImpl(uow)
 
 
-try:
-    microservices = ast.literal_eval(os.environ["MICROSERVICES"])
-except KeyError as e:
-    microservices = {}
+microservices = MicroserviceClients(load_microservices(), load_pool_settings())
+background_tasks: Set[asyncio.Task] = set()
 
 
-def get_courses(cids, limit, offset):
-    if len(cids) == 0:
-        cids.append("-")
-    try:
-        return requests.get(
-            microservices.get("courses") + "courses/",
-            params={"ids": cids, "limit": limit, "offset": offset},
-        )
-    except:
-        raise
+@app.on_event("startup")
+async def open_microservice_clients():
+    await microservices.start()
+
+
+@app.on_event("shutdown")
+async def close_microservice_clients():
+    await microservices.close()
+
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+
+    def done(t: asyncio.Task):
+        background_tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error(t.exception())
+
+    task.add_done_callback(done)
+
+
+async def fetch_courses(cids: List[str]) -> List[dict]:
+    r = await microservices.request(
+        "courses",
+        "GET",
+        "courses/",
+        params={"ids": cids, "limit": len(cids), "offset": 0},
+    )
+    r.raise_for_status()
+    return r.json().get("courses")
+
+
+course_cache = CourseMetadataCache(
+    fetch_courses,
+    register_cache(
+        "courses",
+        create_cache(
+            "courses",
+            maxsize=int(os.environ.get("COURSE_CACHE_SIZE", 10000)),
+            ttl=float(os.environ.get("COURSE_CACHE_TTL", 60)),
+        ),
+    ),
+)
+
+
+class CoursesPage(TypedDict):
+    courses: List[dict]
+    count: int
+
+
+async def get_courses(cids, limit, offset) -> CoursesPage:
+    courses = await course_cache.get_many(cids)
+    found = [courses[cid] for cid in dict.fromkeys(cids) if cid in courses]
+    return {"courses": found[offset : offset + limit], "count": len(found)}
+
+
+COURSES_TIMEOUT_BUDGET = float(os.environ.get("COURSES_TIMEOUT_BUDGET", 5))
+
+
+async def get_courses_pages(cid_lists, limit, offset) -> List[Optional[CoursesPage]]:
+    """Fetch one page of courses per id list concurrently, all within
+    COURSES_TIMEOUT_BUDGET seconds. Pages that fail or run out of time are
+    None so that callers can still answer with the others."""
+    tasks = [
+        asyncio.ensure_future(get_courses(cids, limit, offset)) for cids in cid_lists
+    ]
+    done, pending = await asyncio.wait(tasks, timeout=COURSES_TIMEOUT_BUDGET)
+    for task in pending:
+        task.cancel()
+        logger.error("Courses request exceeded the timeout budget")
+
+    pages: List[Optional[CoursesPage]] = []
+    for task in tasks:
+        if task in done and task.exception() is None:
+            pages.append(task.result())
+        else:
+            if task in done:
+                logger.error(task.exception())
+            pages.append(None)
+    return pages
 
 
 @app.get(
@@ -194,8 +411,10 @@ async def pay(user_id, price, creator_id=None):
     if creator_id is not None:
         body["receiverId"] = creator_id
     logger.info(body)
-    return requests.post(
-        microservices.get("payments") + "payments/deposit",
+    return await microservices.request(
+        "payments",
+        "POST",
+        "payments/deposit",
         json=body,
     )
 
@@ -222,7 +441,7 @@ async def subscribe(
 ):
     try:
         sub_query.sub_id_exists(sub_id)
-        sub = sub_command.subscribe(user_id=user_id, sub_id=sub_id)
+        sub = await run_db(sub_command.subscribe, user_id=user_id, sub_id=sub_id)
         price: float = 0
         for i in sub_query.get_subscriptions():
             if i.id == sub_id:
@@ -250,11 +469,13 @@ async def subscribe(
     except PaymentError as e:
         logger.error(e)
         logger.error(p.json())
-        sub_command.unsubscribe(user_id=user_id)
+        await run_db(sub_command.unsubscribe, user_id=user_id)
         raise HTTPException(
             status_code=p.status_code,
             detail=p.json(),
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -281,7 +502,7 @@ async def get_subscription(
     sub_command: SubscriptionCommandUseCase = Depends(subscription_command_usecase),
 ):
     try:
-        sub_id = sub_command.user_sub_type(user_id=user_id)
+        sub_id = await run_db(sub_command.user_sub_type, user_id=user_id)
         for i in sub_query.get_subscriptions():
             if i.id == sub_id:
                 return i
@@ -296,6 +517,8 @@ async def get_subscription(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.message,
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -319,7 +542,7 @@ async def unsubscribe(
     sub_command: SubscriptionCommandUseCase = Depends(subscription_command_usecase),
 ):
     try:
-        sub = sub_command.unsubscribe(user_id=user_id)
+        sub = await run_db(sub_command.unsubscribe, user_id=user_id)
     except UserNotSubscribedError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -330,6 +553,8 @@ async def unsubscribe(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.message,
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -367,14 +592,19 @@ async def enroll(
     sub_command: SubscriptionCommandUseCase = Depends(subscription_command_usecase),
 ):
     try:
-        r = get_courses(course_id, 1, 0)
-        c = r.json().get("courses")
+        r = await get_courses([course_id], 1, 0)
+        c = r["courses"]
         logger.info(c)
         if len(c) == 0:
             raise CourseNotFoundError
-        sub_command.check_enr_permission(c[0].get("subscription_id"), user_id)
-        enrollment = enr_command.enroll(user_id=user_id, course_id=course_id)
-        sub_id = sub_command.user_sub_type(user_id=user_id)
+        await run_db(
+            sub_command.check_enr_permission, c[0].get("subscription_id"), user_id
+        )
+        enrollment = await run_db(
+            enr_command.enroll, user_id=user_id, course_id=course_id
+        )
+        metrics_cache.record_writes()
+        sub_id = await run_db(sub_command.user_sub_type, user_id=user_id)
         for i in sub_query.get_subscriptions():
             if i.id == sub_id:
                 sub = i
@@ -407,11 +637,14 @@ async def enroll(
     except PaymentError as e:
         logger.error(e)
         logger.error(p.json())
-        enr_command.unenroll(user_id=user_id, course_id=course_id)
+        await run_db(enr_command.unenroll, user_id=user_id, course_id=course_id)
+        metrics_cache.record_writes()
         raise HTTPException(
             status_code=p.status_code,
             detail=p.json(),
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -421,6 +654,97 @@ async def enroll(
     return enrollment
 
 
+ENROLLMENT_BATCH_MAX = int(os.environ.get("ENROLLMENT_BATCH_MAX", 5000))
+
+
+@app.post(
+    "/subscriptions/enrollments/batch",
+    response_model=List[EnrollmentBatchResultModel],
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_409_CONFLICT: {
+            "model": ErrorMessageUserAlreadyEnrolled,
+        },
+    },
+    tags=["enrollments"],
+)
+async def enroll_batch(
+    items: List[EnrollmentCreateModel],
+    enr_command: EnrollmentCommandUseCase = Depends(enrollment_command_usecase),
+    sub_query: SubscriptionQueryUseCase = Depends(subscription_query_usecase),
+    sub_command: SubscriptionCommandUseCase = Depends(subscription_command_usecase),
+):
+    """Enroll many users at once in courses that are free for them. Each item
+    gets its own status, in the order they were sent: users without the
+    subscription a course requires are forbidden, and enrollments that would
+    have to be paid for must go through the single enrollment endpoint."""
+    if len(items) > ENROLLMENT_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {ENROLLMENT_BATCH_MAX} enrollments per batch",
+        )
+    try:
+        courses = await course_cache.get_many([i.course_id for i in items])
+        sub_types = await run_db(
+            sub_command.subscribed_sub_types, [i.user_id for i in items]
+        )
+        subs = {s.id: s for s in sub_query.get_subscriptions()}
+        rejections: List[Optional[str]] = []
+        for i in items:
+            course = courses.get(i.course_id)
+            course_sub_id = None if course is None else course.get("subscription_id")
+            user_sub_id = sub_types.get(i.user_id)
+            if course is None or course_sub_id is None:
+                rejections.append(COURSE_NOT_FOUND)
+            elif user_sub_id is None or not has_enr_permission(
+                course_sub_id, user_sub_id
+            ):
+                rejections.append(FORBIDDEN)
+            elif (
+                apply_discount(course.get("price"), subs[user_sub_id], course_sub_id)
+                > 0
+            ):
+                rejections.append(PAYMENT_REQUIRED)
+            else:
+                rejections.append(None)
+        pairs = [
+            (i.user_id, i.course_id)
+            for i, rejection in zip(items, rejections)
+            if rejection is None
+        ]
+        enrollments = iter(await run_db(enr_command.enroll_many, pairs))
+    except UserAlreadyEnrolledError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=e.message,
+        )
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        logger.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    results = []
+    for i, rejection in zip(items, rejections):
+        if rejection is not None:
+            result_status, enrollment = rejection, None
+        else:
+            enrollment = next(enrollments)
+            result_status = ENROLLED if enrollment else ALREADY_ENROLLED
+        results.append(
+            EnrollmentBatchResultModel(
+                user_id=i.user_id,
+                course_id=i.course_id,
+                status=result_status,
+                enrollment=enrollment,
+            )
+        )
+    metrics_cache.record_writes(sum(r.status == ENROLLED for r in results))
+    return results
+
+
 @app.patch(
     "/subscriptions/{course_id}/enrollments/{user_id}",
     response_model=EnrollmentReadModel,
@@ -438,12 +762,17 @@ async def unenroll(
     enr_command: EnrollmentCommandUseCase = Depends(enrollment_command_usecase),
 ):
     try:
-        enrollment = enr_command.unenroll(user_id=user_id, course_id=course_id)
+        enrollment = await run_db(
+            enr_command.unenroll, user_id=user_id, course_id=course_id
+        )
+        metrics_cache.record_writes()
     except UserNotEnrolledError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=e.message,
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -453,49 +782,52 @@ async def unenroll(
     return enrollment
 
 
-def notify_users_successful(users: List[str], course_name: str):
+async def notify_users_successful(users: List[str], course_name: str):
     body = {
         "usersToNotify": users,
         "courseName": course_name,
         "courseNewState": "Cancelled",
     }
-    requests.post(
-        microservices.get("notifications") + "notifications/course-state-change",
+    await microservices.request(
+        "notifications",
+        "POST",
+        "notifications/course-state-change",
         json=body,
     )
 
 
-def notify_users_error(users: List[str], detail: str):
+async def notify_users_error(users: List[str], detail: str):
     body = {
         "usersToNotify": users,
         "errorMessage": detail,
     }
-    requests.post(
-        microservices.get("notifications") + "notifications/error-report",
+    await microservices.request(
+        "notifications",
+        "POST",
+        "notifications/error-report",
         json=body,
     )
 
 
-async def reimburse(reimbursements, creator_id, total):
-    deposit = await pay(creator_id, total)
-    if deposit.status_code != 200:
+async def deposit(creator_id, total):
+    r = await pay(creator_id, total)
+    if r.status_code != 200:
         raise PaymentError
 
-    url = microservices.get("payments")
-    try:
-        requests.post(url + "payments/pay", json=reimbursements, timeout=0.01,)
-    except requests.exceptions.ReadTimeout:
-        pass
+
+def reimburse(reimbursements):
+    run_in_background(
+        microservices.request("payments", "POST", "payments/pay", json=reimbursements)
+    )
 
 
 def get_reimbursements(users, price, sub_query, sub_command, sub_id):
     subs = sub_query.get_subscriptions()
+    sub_types = sub_command.users_sub_types(users)
     reimbursements = []
     total = 0
     for i in users:
-        discounted_price = apply_discount(
-            price, subs[sub_command.user_sub_type(i)], sub_id
-        )
+        discounted_price = apply_discount(price, subs[sub_types[i]], sub_id)
         total += discounted_price
         reimbursements.append(
             {"receiverId": i, "amountInEthers": f"{discounted_price:.12f}"[0:12]}
@@ -521,25 +853,42 @@ async def unenroll_all(
     price: float,
     sub_id: int,
     enr_command: EnrollmentCommandUseCase = Depends(enrollment_command_usecase),
-    enr_query: EnrollmentQueryUseCase = Depends(enrollment_query_usecase),
     sub_query: SubscriptionQueryUseCase = Depends(subscription_query_usecase),
     sub_command: SubscriptionCommandUseCase = Depends(subscription_command_usecase),
 ):
     try:
-        users = enr_query.fetch_users_from_course(id=course_id, only_active=True)
-
-        reimbursements, total = get_reimbursements(
-            users, price, sub_query, sub_command, sub_id
+        # The enrollments are only deactivated for good once every student's
+        # reimbursement is known. The transaction is committed before calling
+        # the payments service, so that no locks are held across it.
+        users = await run_db(
+            enr_command.unenroll_all, course_id=course_id, commit=False
         )
+        try:
+            if len(users) == 0:
+                raise NoStudentsInCourseError
+            reimbursements, total = await run_db(
+                get_reimbursements, users, price, sub_query, sub_command, sub_id
+            )
+            await run_db(enr_command.commit)
+        except BaseException:
+            await run_db(enr_command.rollback)
+            raise
+        metrics_cache.record_writes(len(users))
 
-        enr_command.unenroll_all(course_id=course_id)
         if price > 0:
-            await reimburse(reimbursements, creator_id, total)
-        notify_users_successful(users, course_name)
+            try:
+                await deposit(creator_id, total)
+            except PaymentError:
+                # Nobody is reimbursed, so the students are enrolled again.
+                await run_db(enr_command.enroll_many, [(u, course_id) for u in users])
+                metrics_cache.record_writes(len(users))
+                raise
+            reimburse(reimbursements)
+        await notify_users_successful(users, course_name)
 
     except PaymentError as e:
         users.append(creator_id)
-        notify_users_error(
+        await notify_users_error(
             users,
             "Reimbursements failed when cancelling course "
             + course_name
@@ -551,6 +900,8 @@ async def unenroll_all(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=e.message,
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -574,18 +925,19 @@ async def get_cancel_fee(
     price: float,
     sub_id: int,
     enr_query: EnrollmentQueryUseCase = Depends(enrollment_query_usecase),
-    sub_command: SubscriptionCommandUseCase = Depends(subscription_command_usecase),
     sub_query: SubscriptionQueryUseCase = Depends(subscription_query_usecase),
 ):
     try:
-        users = enr_query.fetch_users_from_course(id=course_id, only_active=True)
+        students = await run_db(enr_query.count_students_by_sub_type, id=course_id)
         subs = sub_query.get_subscriptions()
         total = 0
-        for i in users:
-            total += apply_discount(price, subs[sub_command.user_sub_type(i)], sub_id)
+        for sub_type, count in students.items():
+            total += apply_discount(price, subs[sub_type], sub_id) * count
     except NoStudentsInCourseError as e:
         logger.error(e)
         return 0
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
@@ -595,15 +947,53 @@ async def get_cancel_fee(
     return total
 
 
-def get_users(uids, request):
+ENROLLED_USERS_PAGE_SIZE = int(os.environ.get("ENROLLED_USERS_PAGE_SIZE", 1000))
+
+
+def encode_cursor(user_id: str) -> str:
+    return base64.urlsafe_b64encode(user_id.encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    if cursor is None:
+        return None
+    try:
+        return base64.b64decode(cursor, altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def page_size(limit: int) -> int:
+    return max(1, min(limit, ENROLLED_USERS_PAGE_SIZE))
+
+
+def next_cursor(
+    response: Response, users: List[str], size: int
+) -> Tuple[List[str], Optional[str]]:
+    """Trim the one extra user fetched past the page and, when there was one,
+    return a cursor at the page's last user, also sent as X-Next-Cursor."""
+    if len(users) <= size:
+        return users, None
+    users = users[:size]
+    cursor = encode_cursor(users[-1])
+    response.headers["X-Next-Cursor"] = cursor
+    return users, cursor
+
+
+async def get_users(uids, request):
     try:
         h = {"authorization": request.headers.get("authorization")}
         ids = ""
         for i in uids:
             ids = ids + i + ","
         logger.info(uids)
-        return requests.get(
-            microservices.get("users") + "users/filter-by-ids",
+        return await microservices.request(
+            "users",
+            "GET",
+            "users/filter-by-ids",
             headers=h,
             params={"ids": ids[:-1]},
         )
@@ -613,7 +1003,7 @@ def get_users(uids, request):
 
 @app.get(
     "/subscriptions/{course_id}/enrollments/course/id-only",
-    response_model=List[str],
+    response_model=PaginatedUserIdReadModel,
     status_code=status.HTTP_200_OK,
     responses={
         status.HTTP_404_NOT_FOUND: {
@@ -624,26 +1014,40 @@ def get_users(uids, request):
 )
 async def get_users_enrolled_id_only(
     course_id: str,
+    response: Response,
     only_active: bool = True,
+    limit: int = ENROLLED_USERS_PAGE_SIZE,
+    cursor: Optional[str] = None,
     enr_query: EnrollmentQueryUseCase = Depends(enrollment_query_usecase),
 ):
+    after = decode_cursor(cursor)
+    size = page_size(limit)
     try:
-        users = enr_query.fetch_users_from_course(id=course_id, only_active=only_active)
+        users = await run_db(
+            enr_query.fetch_users_from_course,
+            id=course_id,
+            only_active=only_active,
+            limit=size + 1,
+            after=after,
+        )
+        users, cursor = next_cursor(response, users, size)
     except NoStudentsInCourseError as e:
         logger.info(e)
-        return []
+        return PaginatedUserIdReadModel.empty()
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-    return users
+    return PaginatedUserIdReadModel(users=users, next=cursor)
 
 
 @app.get(
     "/subscriptions/{course_id}/enrollments/course",
-    response_model=List[UserReadModel],
+    response_model=PaginatedUserReadModel,
     status_code=status.HTTP_200_OK,
     responses={
         status.HTTP_404_NOT_FOUND: {
@@ -658,31 +1062,47 @@ async def get_users_enrolled_id_only(
 async def get_users_enrolled(
     request: Request,
     course_id: str,
+    response: Response,
     only_active: bool = True,
+    limit: int = ENROLLED_USERS_PAGE_SIZE,
+    cursor: Optional[str] = None,
     enr_query: EnrollmentQueryUseCase = Depends(enrollment_query_usecase),
 ):
+    after = decode_cursor(cursor)
+    size = page_size(limit)
     try:
-        users = enr_query.fetch_users_from_course(id=course_id, only_active=only_active)
-        server_response = get_users(uids=users, request=request)
+        users = await run_db(
+            enr_query.fetch_users_from_course,
+            id=course_id,
+            only_active=only_active,
+            limit=size + 1,
+            after=after,
+        )
+        users, cursor = next_cursor(response, users, size)
+        server_response = await get_users(uids=users, request=request)
         logger.info(server_response)
         logger.info(server_response.status_code)
         if server_response.status_code == status.HTTP_403_FORBIDDEN:
             raise InvalidCredentialsError
     except NoStudentsInCourseError as e:
         logger.info(e)
-        return []
+        return PaginatedUserReadModel.empty()
     except InvalidCredentialsError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=e.message,
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-    return json.loads(server_response.text)
+    return PaginatedUserReadModel(
+        users=[UserReadModel(**u) for u in server_response.json()], next=cursor
+    )
 
 
 @app.get(
@@ -703,22 +1123,94 @@ async def get_courses_enrolled(
     enr_query: EnrollmentQueryUseCase = Depends(enrollment_query_usecase),
 ):
     try:
-        enr_list = enr_query.fetch_courses_from_user(id=user_id)
-        enrolled = get_courses(cids=enr_list["enrolled"], limit=limit, offset=offset)
-        unenrolled = get_courses(
-            cids=enr_list["unenrolled"], limit=limit, offset=offset
+        enr_list = await run_db(enr_query.fetch_courses_from_user, id=user_id)
+        enrolled, unenrolled = await get_courses_pages(
+            [enr_list["enrolled"], enr_list["unenrolled"]], limit=limit, offset=offset
         )
+        if enrolled is None and unenrolled is None:
+            raise CoursesNotFoundError
 
     except StudentNotEnrolledError as e:
         logger.info(e)
         return CoursesListReadModel.empty()
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        logger.error(e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    return CoursesListReadModel.from_payloads(enrolled, unenrolled)
+
+
+EXPORT_BATCH_SIZE = int(os.environ.get("ENROLLMENT_EXPORT_BATCH_SIZE", 5000))
+EXPORT_FIELDS = ("course_id", "user_id", "active", "updated_at")
+
+
+def next_batch(batches: Generator[List[tuple], None, None]) -> Optional[List[tuple]]:
+    return next(batches, None)
+
+
+async def enrollment_lines(
+    batches: Generator[List[tuple], None, None], batch: Optional[List[tuple]]
+) -> AsyncIterator[bytes]:
+    try:
+        while batch is not None:
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in batch
+            ).encode()
+            batch = await run_db(next_batch, batches)
+    finally:
+        await run_db(batches.close)
+
+
+@app.get(
+    "/subscriptions/enrollments/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    tags=["enrollments"],
+)
+async def export_enrollments(
+    course_id: Optional[str] = None,
+    only_active: bool = True,
+    enr_query: EnrollmentQueryUseCase = Depends(enrollment_query_usecase),
+):
+    # The first batch is read before the response starts, so that failing to
+    # query is reported with a status code rather than an empty 200.
+    batches = enr_query.stream_enrollments(course_id, only_active, EXPORT_BATCH_SIZE)
+    try:
+        batch = await run_db(next_batch, batches)
+
+    except ExecutorSaturatedError:
+        # Not started yet, so closing it does no database work.
+        batches.close()
+        raise
     except Exception as e:
         logger.error(e)
+        batches.close()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-    return CoursesListReadModel.from_responses(enrolled, unenrolled)
+    return StreamingResponse(
+        enrollment_lines(batches, batch), media_type="application/x-ndjson"
+    )
+
+
+async def compute_enrollment_metrics(
+    limit: int, min_timestamp: int, max_timestamp: int
+) -> LimitedEnrollmentMetricsReadModel:
+    async with open_session() as session:
+        metrics, count = await run_db(
+            enrollment_query_usecase(session).get_enrollment_metrics,
+            limit=limit,
+            min_timestamp=min_timestamp,
+            max_timestamp=max_timestamp,
+        )
+    cids = list(map(lambda m: m.course_id, metrics))
+    courses = await get_courses(cids, limit, 0)
+    return LimitedEnrollmentMetricsReadModel.from_lists(courses, metrics, count)
 
 
 @app.get(
@@ -730,24 +1222,59 @@ async def get_courses_enrolled(
 async def get_enrollment_metrics(
     limit: int = 10,
     min_timestamp: int = 0,
-    max_timestamp: int = None,
-    query_usecase: EnrollmentQueryUseCase = Depends(enrollment_query_usecase),
+    max_timestamp: Optional[int] = None,
 ):
     try:
-        if max_timestamp is None:
-            max_timestamp = int(datetime.now().timestamp() * 1000)
-        metrics, count = query_usecase.get_enrollment_metrics(
-            limit=limit, min_timestamp=min_timestamp, max_timestamp=max_timestamp
-        )
-        cids = list(map(lambda m: m.course_id, metrics))
-        courses = get_courses(cids, limit, 0)
-
+        key = f"{limit}:{min_timestamp}:{max_timestamp}"
+        version = None
+        if max_timestamp is not None:
+            end = max_timestamp
+        else:
+            now = int(datetime.now().timestamp() * 1000)
+            # Open-ended ranges end with the current METRICS_CACHE_SNAP window,
+            # so every request in the window shares one cached result.
+            if METRICS_CACHE_SNAP > 0:
+                snap = int(METRICS_CACHE_SNAP * 1000)
+                version = now // snap
+                end = (version + 1) * snap - 1
+            else:
+                end = now
+
+        if METRICS_CACHE_SNAP > 0:
+            return await metrics_cache.get(
+                key,
+                version,
+                lambda: compute_enrollment_metrics(limit, min_timestamp, end),
+            )
+        return await compute_enrollment_metrics(limit, min_timestamp, end)
+
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-    return LimitedEnrollmentMetricsReadModel.from_lists(
-        json.loads(courses.text), metrics, count
-    )
+
+@app.get(
+    "/metrics/database",
+    response_model=Dict[str, float],
+    status_code=status.HTTP_200_OK,
+    tags=["metrics"],
+)
+async def get_database_metrics():
+    metrics = pool_metrics.snapshot()
+    for name, value in db_executor.snapshot().items():
+        metrics[f"executor_{name}"] = value
+    return metrics
+
+
+@app.get(
+    "/metrics",
+    response_class=Response,
+    status_code=status.HTTP_200_OK,
+    tags=["metrics"],
+)
+async def get_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
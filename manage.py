@@ -0,0 +1,97 @@
+import argparse
+import logging
+import os
+import sys
+from logging import config
+
+from app.infrastructure.bulk_import import KINDS, import_file
+from app.infrastructure.database import Base, engine
+from app.infrastructure.migrations import (
+    create_missing_indexes,
+    deactivate_duplicate_active_rows,
+    drop_superseded_indexes,
+    rebuild_enrollment_rollups,
+)
+
+config.fileConfig("logging.conf", disable_existing_loggers=False)
+logger = logging.getLogger(__name__)
+
+
+def migrate(args):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        deactivated = deactivate_duplicate_active_rows(connection)
+    for table, count in deactivated.items():
+        logger.info("%s: deactivated %d duplicate active rows", table, count)
+    for index in create_missing_indexes(engine):
+        logger.info("created index %s", index)
+    with engine.begin() as connection:
+        for index in drop_superseded_indexes(connection):
+            logger.info("dropped index %s", index)
+    rebuild_rollups(args)
+
+
+def rebuild_rollups(args):
+    with engine.begin() as connection:
+        buckets = rebuild_enrollment_rollups(connection)
+    logger.info("enrollment_rollups: rebuilt %d buckets", buckets)
+
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+MAX_LOGGED_ERRORS = 20
+
+
+def import_records(args):
+    fmt = args.format or FORMATS.get(os.path.splitext(args.file)[1])
+    if fmt is None:
+        sys.exit(f"Cannot tell the format of {args.file}, pass --format")
+    f = sys.stdin if args.file == "-" else open(args.file, newline="", encoding="utf-8")
+    try:
+        with engine.begin() as connection:
+            report = import_file(
+                connection, args.kind, f, fmt, args.workers, args.chunk_size
+            )
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    for error in report.errors[:MAX_LOGGED_ERRORS]:
+        logger.warning("rejected %s", error)
+    for line in report.lines():
+        logger.info(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subscriptions service management")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "migrate",
+        help="Bring an existing database up to date with the declared schema",
+    ).set_defaults(func=migrate)
+    commands.add_parser(
+        "rebuild-rollups",
+        help="Recount the enrollment metrics rollup from the enrollments table",
+    ).set_defaults(func=rebuild_rollups)
+
+    importer = commands.add_parser(
+        "import",
+        help="Bulk load subscriptions or enrollments from a CSV or NDJSON file",
+    )
+    importer.add_argument("kind", choices=sorted(KINDS))
+    importer.add_argument("file", help="Path to the records, - for stdin")
+    importer.add_argument("--format", choices=["csv", "ndjson"])
+    importer.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Validation processes (default: one per CPU)",
+    )
+    importer.add_argument("--chunk-size", type=int, default=10000)
+    importer.set_defaults(func=import_records)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
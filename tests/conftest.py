@@ -0,0 +1,71 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.infrastructure.database import Base  # noqa: E402
+from app.infrastructure.metrics.query_stats import QueryStats  # noqa: E402
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def pg_engine():
+    """An engine on the PostgreSQL database at TEST_DATABASE_URL, with the
+    schema created for the test. Tests that use it are skipped without one."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    # Lock waits fail instead of hanging the suite when a test goes wrong.
+    engine = create_engine(url, connect_args={"options": "-c lock_timeout=10000"})
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture
+def max_queries(db_session):
+    """``with max_queries(n):`` fails the test when the block runs more than
+    ``n`` statements on ``db_session`` or repeats a statement shape often
+    enough to look like an N+1."""
+    engine = db_session.get_bind()
+
+    @contextmanager
+    def check(limit: int):
+        stats = QueryStats()
+
+        def record(conn, cursor, statement, parameters, context, many):
+            stats.record(statement, 0.0)
+
+        event.listen(engine, "after_cursor_execute", record)
+        try:
+            yield stats
+        finally:
+            event.remove(engine, "after_cursor_execute", record)
+        assert stats.count <= limit, stats.report()
+        assert not stats.repeated(), stats.report()
+
+    return check
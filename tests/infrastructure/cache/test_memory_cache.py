@@ -0,0 +1,32 @@
+from app.infrastructure.cache.memory_cache import MemoryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMemoryCache:
+    def test_get_should_return_value_until_it_expires(self):
+        clock = FakeClock()
+        cache = MemoryCache(maxsize=10, ttl=5, clock=clock)
+        cache.set("user_1", {"sub_id": 1})
+
+        assert cache.get("user_1") == {"sub_id": 1}
+        clock.now = 5
+        assert cache.get("user_1") is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 0}
+
+    def test_set_should_evict_least_recently_used(self):
+        cache = MemoryCache(maxsize=2, ttl=60)
+        cache.set("user_1", 1)
+        cache.set("user_2", 2)
+        cache.get("user_1")
+        cache.set("user_3", 3)
+
+        assert cache.get("user_2") is None
+        assert cache.get("user_1") == 1
+        assert cache.stats()["evictions"] == 1
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from app.infrastructure.cache.memory_cache import MemoryCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.infrastructure.cache.redis_cache import RedisCache  # noqa: E402
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestRedisCache:
+    def test_values_should_be_shared_between_workers(self):
+        server = fakeredis.FakeServer()
+        worker_1 = RedisCache(fakeredis.FakeRedis(server=server), "subs", ttl=30)
+        worker_2 = RedisCache(fakeredis.FakeRedis(server=server), "subs", ttl=30)
+
+        worker_1.set("user_1", {"sub_id": 1})
+
+        assert worker_2.get("user_1") == {"sub_id": 1}
+        assert worker_2.get("user_2") is None
+        assert worker_2.stats()["hits"] == 1
+        assert worker_2.stats()["misses"] == 1
+
+    def test_delete_should_invalidate_local_copies_of_other_workers(self):
+        server = fakeredis.FakeServer()
+        worker_1 = RedisCache(
+            fakeredis.FakeRedis(server=server), "subs", ttl=30, local=MemoryCache()
+        )
+        worker_2 = RedisCache(
+            fakeredis.FakeRedis(server=server), "subs", ttl=30, local=MemoryCache()
+        )
+        try:
+            worker_1.set("user_1", {"sub_id": 1})
+            assert worker_2.get("user_1") == {"sub_id": 1}
+
+            worker_1.delete("user_1")
+
+            assert wait_for(lambda: worker_2.local.get("user_1") is None)
+            assert worker_2.get("user_1") is None
+        finally:
+            worker_1.close()
+            worker_2.close()
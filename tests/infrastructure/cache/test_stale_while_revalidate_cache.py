@@ -0,0 +1,80 @@
+import asyncio
+
+from app.infrastructure.cache.stale_while_revalidate_cache import (
+    StaleWhileRevalidateCache,
+)
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    async def compute(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.calls
+
+
+class TestStaleWhileRevalidateCache:
+    def test_concurrent_misses_should_share_one_computation(self):
+        cache = StaleWhileRevalidateCache(max_stale=60, max_writes=10)
+        counter = Counter()
+
+        async def run():
+            return await asyncio.gather(
+                *(cache.get("k", 1, counter.compute) for _ in range(10))
+            )
+
+        assert asyncio.run(run()) == [1] * 10
+        assert counter.calls == 1
+
+    def test_new_version_should_serve_stale_value_while_refreshing(self):
+        cache = StaleWhileRevalidateCache(max_stale=60, max_writes=10)
+        counter = Counter()
+
+        async def run():
+            first = await cache.get("k", 1, counter.compute)
+            same = await cache.get("k", 1, counter.compute)
+            stale = await cache.get("k", 2, counter.compute)
+            await asyncio.gather(*cache.refreshing.values())
+            fresh = await cache.get("k", 2, counter.compute)
+            return first, same, stale, fresh
+
+        assert asyncio.run(run()) == (1, 1, 1, 2)
+        assert counter.calls == 2
+
+    def test_writes_past_threshold_should_refresh(self):
+        cache = StaleWhileRevalidateCache(max_stale=60, max_writes=3)
+        counter = Counter()
+
+        async def run():
+            await cache.get("k", None, counter.compute)
+            cache.record_writes(2)
+            await cache.get("k", None, counter.compute)
+            assert cache.refreshing == {}
+            cache.record_writes()
+            stale = await cache.get("k", None, counter.compute)
+            await asyncio.gather(*cache.refreshing.values())
+            return stale, await cache.get("k", None, counter.compute)
+
+        assert asyncio.run(run()) == (1, 2)
+
+    def test_errors_should_reach_waiters_and_not_be_cached(self):
+        cache = StaleWhileRevalidateCache(max_stale=60, max_writes=10)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ConnectionError
+
+        async def run():
+            return await asyncio.gather(
+                cache.get("k", 1, failing),
+                cache.get("k", 1, failing),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert cache.refreshing == {}
+        assert cache.entries.get("k") is None
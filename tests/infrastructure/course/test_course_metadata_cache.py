@@ -0,0 +1,83 @@
+import asyncio
+
+from app.infrastructure.cache.memory_cache import MemoryCache
+from app.infrastructure.course.course_metadata_cache import CourseMetadataCache
+
+
+class FakeCoursesService:
+    def __init__(self, courses):
+        self.courses = {c["id"]: c for c in courses}
+        self.requests = []
+
+    async def fetch(self, ids):
+        self.requests.append(ids)
+        await asyncio.sleep(0.01)
+        return [self.courses[i] for i in ids if i in self.courses]
+
+
+class TestCourseMetadataCache:
+    def test_get_many_should_fetch_only_missing_ids(self):
+        service = FakeCoursesService([{"id": "c1"}, {"id": "c2"}])
+        cache = CourseMetadataCache(service.fetch, MemoryCache())
+
+        async def run():
+            await cache.get_many(["c1"])
+            return await cache.get_many(["c1", "c2", "unknown"])
+
+        courses = asyncio.run(run())
+
+        assert courses == {"c1": {"id": "c1"}, "c2": {"id": "c2"}}
+        assert service.requests == [["c1"], ["c2", "unknown"]]
+
+    def test_concurrent_misses_should_share_one_request(self):
+        service = FakeCoursesService([{"id": "c1"}])
+        cache = CourseMetadataCache(service.fetch, MemoryCache())
+
+        async def run():
+            return await asyncio.gather(*(cache.get_many(["c1"]) for _ in range(10)))
+
+        results = asyncio.run(run())
+
+        assert all(r == {"c1": {"id": "c1"}} for r in results)
+        assert service.requests == [["c1"]]
+
+    def test_fetch_errors_should_reach_every_waiter(self):
+        async def failing_fetch(ids):
+            await asyncio.sleep(0.01)
+            raise ConnectionError
+
+        cache = CourseMetadataCache(failing_fetch, MemoryCache())
+
+        async def run():
+            return await asyncio.gather(
+                cache.get_many(["c1"]), cache.get_many(["c1"]), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert cache.in_flight == {}
+
+    def test_get_many_should_not_cache_unknown_courses(self):
+        service = FakeCoursesService([])
+        cache = CourseMetadataCache(service.fetch, MemoryCache())
+
+        asyncio.run(cache.get_many(["c1"]))
+        service.courses["c1"] = {"id": "c1"}
+
+        assert asyncio.run(cache.get_many(["c1"])) == {"c1": {"id": "c1"}}
+
+    def test_waiters_should_refetch_when_the_request_is_cancelled(self):
+        service = FakeCoursesService([{"id": "c1"}])
+        cache = CourseMetadataCache(service.fetch, MemoryCache())
+
+        async def run():
+            leader = asyncio.ensure_future(cache.get_many(["c1"]))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(cache.get_many(["c1"]))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(run()) == {"c1": {"id": "c1"}}
+        assert service.requests == [["c1"], ["c1"]]
@@ -0,0 +1,37 @@
+from app.infrastructure.cache.memory_cache import MemoryCache
+from app.infrastructure.enrollment.cached_enrollment_query_service import (
+    CachedEnrollmentQueryServiceImpl,
+)
+from app.infrastructure.enrollment.cached_enrollment_repository import (
+    CachedEnrollmentRepositoryImpl,
+)
+from app.infrastructure.enrollment.enrollment_repository import (
+    EnrollmentCommandUseCaseUnitOfWorkImpl,
+)
+from app.usecase.enrollment.enrollment_command_usecase import (
+    EnrollmentCommandUseCaseImpl,
+)
+from app.usecase.enrollment.enrollment_query_usecase import EnrollmentQueryUseCaseImpl
+from tests.params import add_enrollments
+
+
+class TestCachedEnrollmentQueryService:
+    def test_enroll_should_invalidate_cached_courses_of_user(self, db_session):
+        add_enrollments(db_session, ("user_1", "course_1", True))
+        cache = MemoryCache()
+        enr_query = EnrollmentQueryUseCaseImpl(
+            CachedEnrollmentQueryServiceImpl(db_session, cache)
+        )
+        assert enr_query.fetch_courses_from_user("user_1")["enrolled"] == ["course_1"]
+        assert cache.get("user_1") is not None
+
+        repository = CachedEnrollmentRepositoryImpl(db_session, cache)
+        EnrollmentCommandUseCaseImpl(
+            EnrollmentCommandUseCaseUnitOfWorkImpl(db_session, repository)
+        ).enroll("user_1", "course_2")
+
+        assert cache.get("user_1") is None
+        assert enr_query.fetch_courses_from_user("user_1")["enrolled"] == [
+            "course_1",
+            "course_2",
+        ]
@@ -0,0 +1,125 @@
+from app.infrastructure.enrollment.enrollment_query_service import (
+    EnrollmentQueryServiceImpl,
+)
+from tests.params import add_enrollments, add_subscriptions
+
+
+class TestEnrollmentQueryService:
+    def test_count_active_users_by_sub_id(self, db_session):
+        add_subscriptions(
+            db_session,
+            ("user_1", 0, True),
+            ("user_2", 2, True),
+            ("user_3", 2, True),
+            ("user_3", 1, False),
+            ("user_4", 1, True),
+        )
+        add_enrollments(
+            db_session,
+            ("user_1", "course_1", True),
+            ("user_2", "course_1", True),
+            ("user_3", "course_1", True),
+            ("user_4", "course_1", False),
+            ("user_4", "course_2", True),
+        )
+        enr_query_service = EnrollmentQueryServiceImpl(db_session)
+
+        counts = enr_query_service.count_active_users_by_sub_id("course_1")
+
+        assert counts == {0: 1, 2: 2}
+
+    def test_fetch_user_ids_from_course(self, db_session):
+        add_enrollments(
+            db_session,
+            ("user_1", "course_1", True),
+            ("user_2", "course_1", True),
+            ("user_2", "course_1", False),
+            ("user_3", "course_1", False),
+            ("user_3", "course_1", False),
+            ("user_4", "course_2", True),
+        )
+        enr_query_service = EnrollmentQueryServiceImpl(db_session)
+
+        active = enr_query_service.fetch_user_ids_from_course("course_1", True)
+        every = enr_query_service.fetch_user_ids_from_course("course_1", False)
+
+        assert sorted(active) == ["user_1", "user_2"]
+        assert sorted(every) == ["user_1", "user_2", "user_3"]
+
+    def test_fetch_courses_from_user(self, db_session):
+        add_enrollments(
+            db_session,
+            ("user_1", "course_2", False),
+            ("user_1", "course_2", True),
+            ("user_1", "course_1", False),
+            ("user_1", "course_1", False),
+            ("user_1", "course_3", True),
+            ("user_2", "course_1", True),
+        )
+        enr_query_service = EnrollmentQueryServiceImpl(db_session)
+
+        courses = enr_query_service.fetch_courses_from_user("user_1")
+
+        assert courses == {"course_1": False, "course_2": True, "course_3": True}
+
+    def test_get_enrollment_metrics(self, db_session):
+        add_enrollments(
+            db_session,
+            ("user_1", "course_1", True),
+            ("user_1", "course_2", True),
+            ("user_2", "course_2", True),
+            ("user_1", "course_3", True),
+            ("user_2", "course_3", True),
+            ("user_3", "course_3", True),
+            ("user_4", "course_3", False),
+            ("user_5", "course_4", True),
+        )
+        enr_query_service = EnrollmentQueryServiceImpl(db_session)
+
+        metrics, total = enr_query_service.get_enrollment_metrics(
+            limit=2, min_timestamp=0, max_timestamp=6
+        )
+        _, all_courses = enr_query_service.get_enrollment_metrics(
+            limit=0, min_timestamp=0, max_timestamp=6
+        )
+
+        assert [(m.course_id, m.count) for m in metrics] == [
+            ("course_3", 3),
+            ("course_2", 2),
+        ]
+        assert total == 3
+        assert all_courses == 3
+
+    def test_fetch_user_ids_from_course_should_page_by_user_id(self, db_session):
+        add_enrollments(
+            db_session,
+            ("user_3", "course_1", True),
+            ("user_1", "course_1", True),
+            ("user_4", "course_1", False),
+            ("user_2", "course_1", True),
+            ("user_5", "course_1", True),
+        )
+        enr_query_service = EnrollmentQueryServiceImpl(db_session)
+
+        first = enr_query_service.fetch_user_ids_from_course("course_1", True, 2)
+        second = enr_query_service.fetch_user_ids_from_course(
+            "course_1", True, 2, after=first[-1]
+        )
+        last = enr_query_service.fetch_user_ids_from_course(
+            "course_1", True, 2, after=second[-1]
+        )
+
+        assert first == ["user_1", "user_2"]
+        assert second == ["user_3", "user_5"]
+        assert last == []
+
+    def test_stream_enrollments_should_yield_batches(self, db_session):
+        add_enrollments(
+            db_session, *((f"user_{i}", "course_1", True) for i in range(5))
+        )
+        enr_query_service = EnrollmentQueryServiceImpl(db_session)
+
+        batches = list(enr_query_service.stream_enrollments(None, True, 2))
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+        assert batches[0][0][0] == "course_1"
@@ -0,0 +1,206 @@
+import random
+import threading
+import time
+
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.domain.enrollment.enrollment_exception import UserNotEnrolledError
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+from app.infrastructure.enrollment.enrollment_query_service import (
+    EnrollmentQueryServiceImpl,
+)
+from app.infrastructure.enrollment.enrollment_repository import (
+    EnrollmentCommandUseCaseUnitOfWorkImpl,
+    EnrollmentRepositoryImpl,
+)
+from app.infrastructure.enrollment.enrollment_rollup_dto import (
+    BUCKET_MS,
+    EnrollmentRollupDTO,
+)
+from app.infrastructure.migrations import rebuild_enrollment_rollups
+from app.usecase.enrollment.enrollment_command_usecase import (
+    EnrollmentCommandUseCaseImpl,
+)
+
+
+def rollup(session):
+    return {
+        r.course_id: r.count
+        for r in session.query(EnrollmentRollupDTO).all()
+        if r.count != 0
+    }
+
+
+def command_usecase(session):
+    return EnrollmentCommandUseCaseImpl(
+        EnrollmentCommandUseCaseUnitOfWorkImpl(
+            session, EnrollmentRepositoryImpl(session)
+        )
+    )
+
+
+def rolled_up_and_active(engine, course_id):
+    with engine.connect() as connection:
+        rolled_up = connection.execute(
+            text("SELECT sum(count) FROM enrollment_rollups WHERE course_id = :c"),
+            {"c": course_id},
+        ).scalar()
+        active = connection.execute(
+            text("SELECT count(*) FROM enrollments WHERE course_id = :c AND active"),
+            {"c": course_id},
+        ).scalar()
+    return rolled_up, active
+
+
+def run_blocked(engine, fn):
+    """Run ``fn`` in a thread and return once it waits for a row lock."""
+    errors = []
+
+    def run():
+        try:
+            fn()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    with engine.connect() as connection:
+        for _ in range(100):
+            waiting = connection.execute(
+                text(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE wait_event_type = 'Lock' AND datname = current_database()"
+                )
+            ).scalar()
+            if waiting:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("the concurrent statement never waited for a lock")
+    return thread, errors
+
+
+class TestEnrollmentRollup:
+    def test_enroll_and_unenroll_should_update_rollup(self, db_session):
+        enr_command = EnrollmentCommandUseCaseImpl(
+            EnrollmentCommandUseCaseUnitOfWorkImpl(
+                db_session, EnrollmentRepositoryImpl(db_session)
+            )
+        )
+
+        enr_command.enroll("user_1", "course_1")
+        enr_command.enroll("user_2", "course_1")
+        enr_command.enroll("user_1", "course_2")
+        assert rollup(db_session) == {"course_1": 2, "course_2": 1}
+
+        enr_command.unenroll("user_1", "course_1")
+        assert rollup(db_session) == {"course_1": 1, "course_2": 1}
+
+    def test_enroll_many_should_skip_enrolled_pairs_and_update_rollup(self, db_session):
+        enr_command = EnrollmentCommandUseCaseImpl(
+            EnrollmentCommandUseCaseUnitOfWorkImpl(
+                db_session, EnrollmentRepositoryImpl(db_session)
+            )
+        )
+        enr_command.enroll("user_1", "course_1")
+
+        results = enr_command.enroll_many(
+            [
+                ("user_1", "course_1"),
+                ("user_2", "course_1"),
+                ("user_1", "course_2"),
+                ("user_2", "course_1"),
+            ]
+        )
+
+        assert [r and (r.user_id, r.course_id) for r in results] == [
+            None,
+            ("user_2", "course_1"),
+            ("user_1", "course_2"),
+            None,
+        ]
+        assert db_session.query(EnrollmentDTO).count() == 3
+        assert rollup(db_session) == {"course_1": 2, "course_2": 1}
+
+    def test_metrics_should_match_enrollments_across_buckets(self, db_session):
+        rnd = random.Random(0)
+        db_session.execute(
+            EnrollmentDTO.__table__.insert(),
+            [
+                dict(
+                    id=f"enr_{i}",
+                    user_id=f"user_{i}",
+                    course_id=f"course_{rnd.randrange(5)}",
+                    active=rnd.random() < 0.8,
+                    updated_at=rnd.randrange(10 * BUCKET_MS),
+                )
+                for i in range(500)
+            ],
+        )
+        rebuild_enrollment_rollups(db_session.connection())
+        db_session.commit()
+        enrollments = db_session.query(EnrollmentDTO).all()
+        enr_query_service = EnrollmentQueryServiceImpl(db_session)
+
+        for min_timestamp, max_timestamp in [
+            (0, 10 * BUCKET_MS),
+            (BUCKET_MS + 1, 7 * BUCKET_MS - 1),
+            (3 * BUCKET_MS - 10, 3 * BUCKET_MS + 10),
+            (2 * BUCKET_MS, 4 * BUCKET_MS - 1),
+        ]:
+            expected = {}
+            for e in enrollments:
+                if e.active and min_timestamp <= e.updated_at <= max_timestamp:
+                    expected[e.course_id] = expected.get(e.course_id, 0) + 1
+
+            metrics, total = enr_query_service.get_enrollment_metrics(
+                limit=10, min_timestamp=min_timestamp, max_timestamp=max_timestamp
+            )
+
+            assert {m.course_id: m.count for m in metrics} == expected
+            assert total == len(expected)
+
+    def test_unenroll_all_should_not_subtract_rows_unenrolled_meanwhile(
+        self, pg_engine
+    ):
+        Session = sessionmaker(bind=pg_engine)
+        with Session() as session:
+            for user_id in ("user_1", "user_2", "user_3"):
+                command_usecase(session).enroll(user_id, "course_1")
+
+        with Session() as unenrolling, Session() as cancelling:
+            EnrollmentRepositoryImpl(unenrolling).unenroll("user_1", "course_1")
+            unenrolling.flush()
+            thread, errors = run_blocked(
+                pg_engine, lambda: command_usecase(cancelling).unenroll_all("course_1")
+            )
+            unenrolling.commit()
+            thread.join()
+
+        assert errors == []
+        assert rolled_up_and_active(pg_engine, "course_1") == (0, 0)
+
+    def test_unenroll_should_fail_for_rows_unenrolled_by_unenroll_all(self, pg_engine):
+        Session = sessionmaker(bind=pg_engine)
+        with Session() as session:
+            for user_id in ("user_1", "user_2"):
+                command_usecase(session).enroll(user_id, "course_1")
+
+        with Session() as cancelling, Session() as unenrolling:
+            assert sorted(
+                command_usecase(cancelling).unenroll_all("course_1", commit=False)
+            ) == ["user_1", "user_2"]
+            thread, errors = run_blocked(
+                pg_engine,
+                lambda: EnrollmentRepositoryImpl(unenrolling).unenroll(
+                    "user_1", "course_1"
+                ),
+            )
+            cancelling.commit()
+            thread.join()
+            unenrolling.commit()
+
+        assert [type(e) for e in errors] == [UserNotEnrolledError]
+        assert rolled_up_and_active(pg_engine, "course_1") == (0, 0)
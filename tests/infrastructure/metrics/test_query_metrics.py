@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+
+from app.infrastructure.metrics.query_metrics import (
+    label_queries,
+    query_duration,
+    query_errors,
+)
+
+
+@label_queries
+class ThingRepository:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def count(self):
+        return self.connection.execute(text("SELECT 1")).scalar()
+
+    def broken(self):
+        return self.connection.execute(text("SELECT * FROM missing")).scalar()
+
+
+class TestQueryMetrics:
+    def test_queries_should_be_timed_by_repository_method(self):
+        engine = create_engine("sqlite://")
+        count = query_duration.labels("ThingRepository.count")
+        broken = query_duration.labels("ThingRepository.broken")
+        errors = query_errors.labels("ThingRepository.broken")
+        before = (sum(count.counts), sum(broken.counts), errors.value)
+
+        with engine.connect() as connection:
+            repository = ThingRepository(connection)
+            assert repository.count() == 1
+            assert repository.count() == 1
+            with pytest.raises(DBAPIError):
+                repository.broken()
+
+        after = (sum(count.counts), sum(broken.counts), errors.value)
+        assert [a - b for a, b in zip(after, before)] == [2, 1, 1]
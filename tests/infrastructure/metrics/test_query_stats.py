@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.infrastructure.metrics.query_stats import (
+    QueryStatsMiddleware,
+    statement_shape,
+    track_queries,
+)
+
+
+class TestQueryStats:
+    def test_statement_shape_should_collapse_bound_lists(self):
+        assert statement_shape("SELECT a FROM t WHERE id IN (?, ?, ?)") == (
+            statement_shape("SELECT a\n  FROM t WHERE id IN (?)")
+        )
+        assert statement_shape("WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == (
+            "WHERE id IN (?)"
+        )
+
+    def test_middleware_should_report_queries_and_repeats(self, caplog):
+        engine = create_engine("sqlite://")
+        track_queries(engine)
+        app = FastAPI()
+        app.add_middleware(QueryStatsMiddleware, threshold=3)
+
+        @app.get("/fan-out")
+        def fan_out():
+            with engine.connect() as connection:
+                for i in range(3):
+                    connection.execute(text("SELECT :i"), {"i": i})
+            return {}
+
+        r = TestClient(app).get("/fan-out")
+
+        assert r.headers["X-DB-Query-Count"] == "3"
+        assert r.headers["X-DB-Repeated-Queries"] == "1"
+        assert "Suspected N+1 in GET /fan-out: 3 x SELECT ?" in caplog.text
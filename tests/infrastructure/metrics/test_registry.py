@@ -0,0 +1,46 @@
+from app.infrastructure.metrics.registry import Registry
+
+
+class TestRegistry:
+    def test_render_should_use_prometheus_text_format(self):
+        registry = Registry()
+        requests = registry.counter("requests", "Requests.", ("route",))
+        latency = registry.histogram(
+            "latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)
+        )
+        requests.labels('/a"b').inc()
+        latency.labels("/a").observe(0.1)
+        latency.labels("/a").observe(0.5)
+        latency.labels("/a").observe(3)
+
+        lines = registry.render().splitlines()
+
+        assert "# TYPE requests counter" in lines
+        assert 'requests_total{route="/a\\"b"} 1.0' in lines
+        assert "# TYPE latency_seconds histogram" in lines
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1.0' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 2.0' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3.0' in lines
+        assert 'latency_seconds_sum{route="/a"} 3.6' in lines
+        assert 'latency_seconds_count{route="/a"} 3.0' in lines
+
+    def test_callback_gauge_should_read_values_on_render(self):
+        registry = Registry()
+        values = {("idle",): 1}
+        registry.callback_gauge(
+            "connections", "Connections.", lambda: values, ("state",)
+        )
+        values[("idle",)] = 4
+
+        assert 'connections{state="idle"} 4.0' in registry.render().splitlines()
+
+    def test_callback_counter_should_render_totals(self):
+        registry = Registry()
+        registry.callback_counter(
+            "hits", "Hits.", lambda: {("courses",): 3}, ("cache",)
+        )
+
+        lines = registry.render().splitlines()
+
+        assert "# TYPE hits counter" in lines
+        assert 'hits_total{cache="courses"} 3.0' in lines
@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.infrastructure.metrics.request_metrics import (
+    UNMATCHED_ROUTE,
+    RequestMetricsMiddleware,
+    request_duration,
+    requests_in_flight,
+    requests_total,
+)
+
+
+def instrumented_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/items/{item_id}/parts")
+    async def get_parts(item_id: str):
+        return []
+
+    return app
+
+
+class TestRequestMetricsMiddleware:
+    def test_requests_should_be_labelled_by_route_template(self):
+        client = TestClient(instrumented_app())
+        ok = requests_total.labels("GET", "/items/{item_id}/parts", "200")
+        missing = requests_total.labels("GET", UNMATCHED_ROUTE, "404")
+        latency = request_duration.labels("GET", "/items/{item_id}/parts")
+        before = (ok.value, missing.value, sum(latency.counts))
+
+        client.get("/items/1/parts")
+        client.get("/items/2/parts")
+        client.get("/other")
+
+        after = (ok.value, missing.value, sum(latency.counts))
+        assert [a - b for a, b in zip(after, before)] == [2, 1, 2]
+        assert requests_in_flight.value == 0
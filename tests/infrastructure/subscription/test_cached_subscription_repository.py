@@ -0,0 +1,60 @@
+from app.infrastructure.cache.memory_cache import MemoryCache
+from app.infrastructure.subscription import subscription_repository
+from app.infrastructure.subscription.cached_subscription_repository import (
+    CachedSubscriptionRepositoryImpl,
+)
+from app.infrastructure.subscription.subscription_repository import (
+    SubscriptionCommandUseCaseUnitOfWorkImpl,
+)
+from app.usecase.subscription.subscription_command_usecase import (
+    SubscriptionCommandUseCaseImpl,
+)
+from tests.params import add_subscriptions
+
+
+def sub_command(session, cache):
+    repository = CachedSubscriptionRepositoryImpl(session, cache)
+    uow = SubscriptionCommandUseCaseUnitOfWorkImpl(
+        session=session, subscription_repository=repository
+    )
+    return SubscriptionCommandUseCaseImpl(uow=uow)
+
+
+class TestCachedSubscriptionRepository:
+    def test_user_sub_type_should_be_served_from_cache(self, db_session):
+        add_subscriptions(db_session, ("user_1", 1, True))
+        cache = MemoryCache()
+
+        assert sub_command(db_session, cache).user_sub_type("user_1") == 1
+        assert sub_command(db_session, cache).user_sub_type("user_1") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_subscribe_should_invalidate_cached_subscription(self, db_session):
+        add_subscriptions(db_session, ("user_1", 0, True))
+        cache = MemoryCache()
+        assert sub_command(db_session, cache).user_sub_type("user_1") == 0
+
+        sub_command(db_session, cache).subscribe("user_1", 2)
+
+        assert cache.get("user_1") is None
+        assert sub_command(db_session, cache).user_sub_type("user_1") == 2
+
+    def test_users_sub_types_should_combine_cache_and_database(self, db_session):
+        add_subscriptions(db_session, ("user_1", 1, True), ("user_2", 2, True))
+        cache = MemoryCache()
+        sub_command(db_session, cache).user_sub_type("user_1")
+
+        sub_types = sub_command(db_session, cache).users_sub_types(["user_1", "user_2"])
+
+        assert sub_types == {"user_1": 1, "user_2": 2}
+
+    def test_users_sub_types_should_query_in_chunks(self, db_session, monkeypatch):
+        monkeypatch.setattr(subscription_repository, "USER_IDS_PER_QUERY", 2)
+        add_subscriptions(db_session, *((f"user_{i}", i % 3, True) for i in range(5)))
+
+        sub_types = sub_command(db_session, MemoryCache()).users_sub_types(
+            [f"user_{i}" for i in range(5)]
+        )
+
+        assert sub_types == {f"user_{i}": i % 3 for i in range(5)}
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure import database
+from app.infrastructure.database import Base, async_url, run_db, use_async_session
+from app.infrastructure.enrollment.enrollment_query_service import (
+    EnrollmentQueryServiceImpl,
+)
+from app.infrastructure.enrollment.enrollment_repository import (
+    EnrollmentCommandUseCaseUnitOfWorkImpl,
+    EnrollmentRepositoryImpl,
+)
+from app.infrastructure.subscription.subscription_repository import (
+    SubscriptionCommandUseCaseUnitOfWorkImpl,
+    SubscriptionRepositoryImpl,
+)
+from app.usecase.enrollment.enrollment_command_usecase import (
+    EnrollmentCommandUseCaseImpl,
+)
+from app.usecase.enrollment.enrollment_query_usecase import EnrollmentQueryUseCaseImpl
+from app.usecase.subscription.subscription_command_usecase import (
+    SubscriptionCommandUseCaseImpl,
+)
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_sessions(monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_ASYNC", True)
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def create_all():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_all())
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+class TestAsyncDatabase:
+    def test_async_url_should_use_asyncio_drivers(self):
+        assert async_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+        assert (
+            async_url("postgresql+psycopg2://u:p@h/db")
+            == "postgresql+asyncpg://u:p@h/db"
+        )
+        assert async_url("sqlite:///a.db") == "sqlite+aiosqlite:///a.db"
+
+    def test_use_cases_should_run_on_async_session(self, async_sessions):
+        async def run():
+            async with async_sessions() as session:
+                sync_session = use_async_session(session)
+                sub_command = SubscriptionCommandUseCaseImpl(
+                    SubscriptionCommandUseCaseUnitOfWorkImpl(
+                        sync_session,
+                        subscription_repository=SubscriptionRepositoryImpl(
+                            sync_session
+                        ),
+                    )
+                )
+                enr_command = EnrollmentCommandUseCaseImpl(
+                    EnrollmentCommandUseCaseUnitOfWorkImpl(
+                        sync_session,
+                        enrollment_repository=EnrollmentRepositoryImpl(sync_session),
+                    )
+                )
+                enr_query = EnrollmentQueryUseCaseImpl(
+                    EnrollmentQueryServiceImpl(sync_session)
+                )
+
+                await run_db(sub_command.subscribe, user_id="user_1", sub_id=0)
+                enrollment = await run_db(
+                    enr_command.enroll, user_id="user_1", course_id="course_1"
+                )
+                users = await run_db(
+                    enr_query.fetch_users_from_course, id="course_1", only_active=True
+                )
+                students = await run_db(
+                    enr_query.count_students_by_sub_type, id="course_1"
+                )
+                return enrollment, users, students
+
+        enrollment, users, students = asyncio.run(run())
+
+        assert enrollment.user_id == "user_1"
+        assert enrollment.active
+        assert users == ["user_1"]
+        assert students == {0: 1}
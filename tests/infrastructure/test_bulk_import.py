@@ -0,0 +1,138 @@
+import json
+
+from sqlalchemy import create_engine, select
+
+from app.infrastructure.bulk_import import import_file
+from app.infrastructure.database import Base
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+from app.infrastructure.enrollment.enrollment_rollup_dto import EnrollmentRollupDTO
+from app.infrastructure.subscription.subscription_dto import SubscriptionDTO
+
+
+def create_engine_with_schema():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def active_ids(connection, table):
+    return sorted(
+        r.id for r in connection.execute(table.select().where(table.c.active))
+    )
+
+
+class TestBulkImport:
+    def test_import_enrollments_should_keep_latest_active_row(self):
+        engine = create_engine_with_schema()
+        enrs = EnrollmentDTO.__table__
+        with engine.begin() as connection:
+            connection.execute(
+                enrs.insert(),
+                [
+                    dict(
+                        id="e1", user_id="u1", course_id="c1", active=True, updated_at=5
+                    ),
+                    dict(
+                        id="e2", user_id="u2", course_id="c1", active=True, updated_at=9
+                    ),
+                ],
+            )
+        lines = [
+            "id,user_id,course_id,active,updated_at\n",
+            "e3,u1,c1,true,7\n",
+            "e4,u2,c1,true,8\n",
+            "e5,u3,c1,true,3\n",
+            "e6,u3,c1,,4\n",
+            "e7,,c1,true,1\n",
+            "e8,u4,c2,maybe,1\n",
+            "e3,u5,c2,true,1\n",
+        ]
+
+        with engine.begin() as connection:
+            report = import_file(connection, "enrollments", lines, "csv", 1, 2)
+            assert active_ids(connection, enrs) == ["e2", "e3", "e6"]
+            assert {
+                r.course_id: r.count
+                for r in connection.execute(EnrollmentRollupDTO.__table__.select())
+            } == {"c1": 3}
+
+        assert (report.read, report.inserted, report.deactivated) == (7, 4, 1)
+        assert report.errors == [
+            "line 6: missing user_id",
+            "line 7: invalid boolean 'maybe'",
+            "duplicate id e3",
+        ]
+
+        with engine.begin() as connection:
+            again = import_file(connection, "enrollments", lines, "csv", 1, 2)
+        assert (again.existing, again.inserted) == (4, 0)
+
+    def test_import_subscriptions_should_validate_in_worker_processes(self):
+        engine = create_engine_with_schema()
+        subs = SubscriptionDTO.__table__
+        lines = [
+            json.dumps(dict(id=f"s{i}", user_id=f"u{i % 10}", sub_id=i % 3))
+            for i in range(100)
+        ]
+        lines.append(json.dumps(dict(id="s100", user_id="u1", sub_id=7)))
+
+        with engine.begin() as connection:
+            report = import_file(connection, "subscriptions", lines, "ndjson", 2, 10)
+            active = active_ids(connection, subs)
+
+        assert report.inserted == 100
+        assert report.errors == ["line 101: unknown sub_id 7"]
+        assert active == [f"s{i}" for i in range(90, 100)]
+
+    def test_import_csv_should_keep_quoted_newlines_in_one_record(self):
+        engine = create_engine_with_schema()
+        lines = [
+            "id,user_id,course_id,active,updated_at\n",
+            'e1,u1,"c\n',
+            '1",true,1\n',
+            "e2,u2,c2,maybe,1\n",
+        ]
+
+        with engine.begin() as connection:
+            report = import_file(connection, "enrollments", lines, "csv", 2, 1)
+            courses = [
+                r.course_id
+                for r in connection.execute(EnrollmentDTO.__table__.select())
+            ]
+
+        assert courses == ["c\n1"]
+        assert report.errors == ["line 4: invalid boolean 'maybe'"]
+
+    def test_import_should_copy_into_postgresql(self, pg_engine):
+        enrs = EnrollmentDTO.__table__
+        with pg_engine.begin() as connection:
+            connection.execute(
+                enrs.insert(),
+                dict(id="e1", user_id="u1", course_id="c1", active=True, updated_at=5),
+            )
+        lines = [
+            "id,user_id,course_id,active,updated_at\n",
+            "e2,u1,c1,true,7\n",
+            'e3,u2,"c\n',
+            '1",true,8\n',
+            "e4,u3,c1,,4\n",
+            "e5,,c1,true,1\n",
+        ]
+
+        with pg_engine.begin() as connection:
+            report = import_file(connection, "enrollments", lines, "csv", 2, 2)
+
+        with pg_engine.connect() as connection:
+            assert active_ids(connection, enrs) == ["e2", "e3", "e4"]
+            assert (
+                connection.execute(
+                    select(enrs.c.course_id).where(enrs.c.id == "e3")
+                ).scalar()
+                == "c\n1"
+            )
+            assert {
+                (r.course_id, r.count)
+                for r in connection.execute(EnrollmentRollupDTO.__table__.select())
+            } == {("c1", 2), ("c\n1", 1)}
+        assert (report.read, report.inserted, report.deactivated) == (4, 3, 1)
+        assert report.errors == ["line 6: missing user_id"]
@@ -0,0 +1,73 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from app.infrastructure.db_executor import BoundedExecutor, ExecutorSaturatedError
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class TestBoundedExecutor:
+    def test_run_should_call_off_the_event_loop_in_caller_context(self):
+        executor = BoundedExecutor(max_workers=2, max_queue=10)
+
+        async def run():
+            request_id.set("r1")
+            return await executor.run(
+                lambda x: (x, threading.current_thread().name, request_id.get()), 1
+            )
+
+        value, thread, rid = asyncio.run(run())
+
+        assert value == 1
+        assert thread.startswith("db")
+        assert rid == "r1"
+        assert executor.snapshot()["completed"] == 1
+        executor.shutdown()
+
+    def test_run_should_reject_when_queue_is_full(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def run():
+            blocking = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+            await asyncio.sleep(0)
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(lambda: "rejected")
+            snapshot = executor.snapshot()
+            release.set()
+            await blocking
+            return snapshot, await queued
+
+        snapshot, result = asyncio.run(run())
+
+        assert result == "queued"
+        assert snapshot["queued"] == 1
+        assert snapshot["running"] == 1
+        assert snapshot["rejected"] == 1
+        assert executor.snapshot()["queued"] == 0
+        assert executor.snapshot()["wait_seconds_max"] > 0
+        executor.shutdown()
+
+    def test_cancelled_call_should_leave_the_queue(self):
+        executor = BoundedExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def run():
+            blocking = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+            await asyncio.sleep(0)
+            queued.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            await blocking
+            return await executor.run(lambda: "after")
+
+        assert asyncio.run(run()) == "after"
+        assert executor.snapshot()["queued"] == 0
+        executor.shutdown()
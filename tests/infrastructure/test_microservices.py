@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.infrastructure.microservices import (
+    MicroserviceClients,
+    MicroserviceNotConfiguredError,
+    errors_total,
+    request_duration,
+    responses_total,
+)
+
+
+def echo(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"url": str(request.url)})
+
+
+class TestMicroserviceClients:
+    def test_request_should_use_service_base_url(self):
+        clients = MicroserviceClients(
+            {"courses": "http://courses/api/"}, transport=httpx.MockTransport(echo)
+        )
+
+        async def run():
+            await clients.start()
+            r = await clients.request(
+                "courses", "GET", "courses/", params={"ids": ["c1", "c2"]}
+            )
+            await clients.close()
+            return r
+
+        r = asyncio.run(run())
+
+        assert r.json()["url"] == "http://courses/api/courses/?ids=c1&ids=c2"
+
+    def test_clients_should_be_shared_between_requests(self):
+        clients = MicroserviceClients(
+            {"users": "http://users/"}, transport=httpx.MockTransport(echo)
+        )
+        assert clients.get("users") is clients.get("users")
+
+    def test_service_settings_should_override_defaults(self):
+        clients = MicroserviceClients(
+            {"payments": "http://payments/"},
+            settings={"payments": {"timeout": 30.0}},
+        )
+        settings = clients.service_settings("payments")
+        assert settings["timeout"] == 30.0
+        assert settings["max_connections"] == 20
+
+    def test_get_should_raise_microservice_not_configured_error(self):
+        clients = MicroserviceClients({})
+        with pytest.raises(MicroserviceNotConfiguredError):
+            clients.get("courses")
+
+    def test_request_should_record_latency_status_and_errors(self):
+        def flaky(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/down":
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(503)
+
+        clients = MicroserviceClients(
+            {"notifications": "http://notifications/"},
+            transport=httpx.MockTransport(flaky),
+        )
+        observed = request_duration.labels("notifications")
+        unavailable = responses_total.labels("notifications", "503")
+        refused = errors_total.labels("notifications", "ConnectError")
+        before = (sum(observed.counts), unavailable.value, refused.value)
+
+        async def run():
+            await clients.request("notifications", "POST", "up")
+            with pytest.raises(httpx.ConnectError):
+                await clients.request("notifications", "POST", "down")
+            await clients.close()
+
+        asyncio.run(run())
+
+        after = (sum(observed.counts), unavailable.value, refused.value)
+        assert [a - b for a, b in zip(after, before)] == [2, 1, 1]
@@ -0,0 +1,121 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.infrastructure.database import Base
+from app.infrastructure.enrollment.enrollment_dto import EnrollmentDTO
+from app.infrastructure.migrations import (
+    create_missing_indexes,
+    deactivate_duplicate_active_rows,
+    drop_superseded_indexes,
+)
+from app.infrastructure.subscription.subscription_dto import SubscriptionDTO
+
+
+def legacy_engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(bind=connection)
+    return engine
+
+
+class TestMigrations:
+    def test_deactivate_duplicate_active_rows_should_keep_latest(self):
+        engine = legacy_engine()
+        subs = SubscriptionDTO.__table__
+        enrs = EnrollmentDTO.__table__
+        with engine.begin() as connection:
+            connection.execute(
+                subs.insert(),
+                [
+                    dict(id="s1", user_id="u1", sub_id=0, active=True, updated_at=1),
+                    dict(id="s2", user_id="u1", sub_id=1, active=True, updated_at=2),
+                    dict(id="s3", user_id="u2", sub_id=0, active=True, updated_at=1),
+                ],
+            )
+            connection.execute(
+                enrs.insert(),
+                [
+                    dict(
+                        id="e1", user_id="u1", course_id="c1", active=True, updated_at=1
+                    ),
+                    dict(
+                        id="e2", user_id="u1", course_id="c1", active=True, updated_at=1
+                    ),
+                    dict(
+                        id="e3", user_id="u1", course_id="c2", active=True, updated_at=1
+                    ),
+                ],
+            )
+            deactivated = deactivate_duplicate_active_rows(connection)
+            active_subs = connection.execute(
+                subs.select().where(subs.c.active)
+            ).fetchall()
+            active_enrs = connection.execute(
+                enrs.select().where(enrs.c.active)
+            ).fetchall()
+
+        assert deactivated == {"subscriptions": 1, "enrollments": 1}
+        assert {s.id for s in active_subs} == {"s2", "s3"}
+        assert {e.id for e in active_enrs} == {"e2", "e3"}
+
+    def test_models_should_declare_partial_unique_indexes(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        indexes = {i["name"]: i for i in inspect(engine).get_indexes("enrollments")}
+        assert indexes["uq_enrollments_user_id_course_id_active"]["unique"]
+        assert "uq_subscriptions_user_id_active" in {
+            i["name"] for i in inspect(engine).get_indexes("subscriptions")
+        }
+
+    def test_drop_superseded_indexes(self):
+        engine = legacy_engine()
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE INDEX ix_enrollments_course_id_active "
+                    "ON enrollments (course_id, active)"
+                )
+            )
+            dropped = drop_superseded_indexes(connection)
+            again = drop_superseded_indexes(connection)
+
+        assert dropped == ["ix_enrollments_course_id_active"]
+        assert again == []
+
+    def test_create_missing_indexes_should_build_them_concurrently(self, pg_engine):
+        enrs = EnrollmentDTO.__table__
+        with pg_engine.begin() as connection:
+            for index in enrs.indexes:
+                index.drop(bind=connection)
+            connection.execute(
+                enrs.insert(),
+                [
+                    dict(
+                        id=f"e{i}",
+                        user_id="u1",
+                        course_id="c1",
+                        active=True,
+                        updated_at=i,
+                    )
+                    for i in range(2)
+                ],
+            )
+
+        created = create_missing_indexes(pg_engine)
+
+        with pg_engine.connect() as connection:
+            names = {i["name"] for i in inspect(connection).get_indexes("enrollments")}
+            invalid = connection.execute(
+                text("SELECT count(*) FROM pg_index WHERE NOT indisvalid")
+            ).scalar()
+        assert "uq_enrollments_user_id_course_id_active" not in created
+        assert "uq_enrollments_user_id_course_id_active" not in names
+        assert (
+            set(created)
+            == names
+            == {i.name for i in enrs.indexes}
+            - {"uq_enrollments_user_id_course_id_active"}
+        )
+        assert invalid == 0
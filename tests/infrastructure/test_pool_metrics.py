@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.infrastructure.database import engine_options
+from app.infrastructure.pool_metrics import InstrumentedQueuePool, PoolMetrics
+
+
+def instrumented_engine(tmp_path):
+    class Pool(InstrumentedQueuePool):
+        metrics = PoolMetrics()
+
+    return create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=Pool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+
+class TestPoolMetrics:
+    def test_snapshot_should_count_checkouts_waits_and_timeouts(self, tmp_path):
+        engine = instrumented_engine(tmp_path)
+        metrics = engine.pool.metrics
+
+        with engine.connect():
+            assert metrics.snapshot()["checked_out"] == 1
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+
+        snapshot = metrics.snapshot()
+        assert snapshot["checkouts"] == 1
+        assert snapshot["waits"] == 0
+        assert snapshot["timeouts"] == 1
+        assert snapshot["checked_out"] == 0
+
+    def test_engine_options_should_read_pool_settings(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_POOL_SIZE", "20")
+        monkeypatch.setenv("DATABASE_STATEMENT_TIMEOUT", "5000")
+
+        options = engine_options("postgresql://user:password@db:5432/db")
+
+        assert options["pool_size"] == 20
+        assert options["pool_pre_ping"]
+        assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+        assert "poolclass" not in engine_options("sqlite://")
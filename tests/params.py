@@ -131,6 +131,7 @@ def already_subscribed(id=None, user_id=None, sub_id=None, active=None):
 
 mocked_enr_1_active = MagicMock()
 mocked_enr_1_active.one = Mock(return_value=enr_dto_1_active)
+mocked_enr_1_active.with_for_update().one = Mock(return_value=enr_dto_1_active)
 
 mocked_sub_0_active = MagicMock()
 mocked_sub_0_active.one = Mock(return_value=sub_dto_0_active)
@@ -167,3 +168,31 @@ def filter_by_course_id(course_id: str):
         if i.course_id == course_id:
             filtered.append(i)
     return q_all_enr
+
+
+def add_enrollments(session, *enrollments):
+    for i, (user_id, course_id, active) in enumerate(enrollments):
+        session.add(
+            EnrollmentDTO(
+                id=f"enr_{i}",
+                user_id=user_id,
+                course_id=course_id,
+                active=active,
+                updated_at=i,
+            )
+        )
+    session.commit()
+
+
+def add_subscriptions(session, *subscriptions):
+    for i, (user_id, sub_id, active) in enumerate(subscriptions):
+        session.add(
+            SubscriptionDTO(
+                id=f"sub_{i}",
+                user_id=user_id,
+                sub_id=sub_id,
+                active=active,
+                updated_at=i,
+            )
+        )
+    session.commit()
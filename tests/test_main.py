@@ -0,0 +1,277 @@
+import importlib
+import inspect
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from tests.params import add_enrollments, add_subscriptions
+
+
+@pytest.fixture
+def client(db_session, monkeypatch):
+    main = importlib.import_module("main")
+    monkeypatch.setattr(main.subscription_cache, "ttl", 0)
+    monkeypatch.setattr(main.enrollment_cache, "ttl", 0)
+    main.app.dependency_overrides[main.get_session] = lambda: db_session
+    try:
+        yield TestClient(main.app)
+    finally:
+        main.app.dependency_overrides.clear()
+
+
+class TestQueryBudgets:
+    def test_subscribe(self, client, max_queries):
+        with max_queries(4):
+            r = client.post("/subscriptions", params={"user_id": "u1", "sub_id": 0})
+        assert r.status_code == 201
+
+    def test_get_subscription(self, client, db_session, max_queries):
+        add_subscriptions(db_session, ("u1", 1, True))
+        with max_queries(1):
+            r = client.get("/subscriptions/u1")
+        assert r.json()["id"] == 1
+
+    def test_enroll(self, client, db_session, max_queries, monkeypatch):
+        async def fetch_courses(cids):
+            return [{"id": cid, "subscription_id": 0, "price": 0} for cid in cids]
+
+        main = importlib.import_module("main")
+        monkeypatch.setattr(main.course_cache, "fetch", fetch_courses)
+        add_subscriptions(db_session, ("u1", 0, True))
+        with max_queries(6):
+            r = client.post("/subscriptions/c1/enrollments", params={"user_id": "u1"})
+        assert r.status_code == 201
+
+    def test_enroll_batch(self, client, db_session, max_queries, monkeypatch):
+        async def fetch_courses(cids):
+            return [
+                {"id": cid, "subscription_id": 1 if cid == "plus" else 0, "price": 0}
+                for cid in cids
+                if cid != "missing"
+            ] + [
+                {"id": "paid", "subscription_id": 0, "price": 10},
+                {"id": "untyped", "price": 0},
+            ]
+
+        main = importlib.import_module("main")
+        monkeypatch.setattr(main.course_cache, "fetch", fetch_courses)
+        add_subscriptions(db_session, *((f"u{i}", 0, True) for i in range(50)))
+        add_enrollments(db_session, ("u0", "c0", True))
+        items = [{"user_id": f"u{i}", "course_id": f"c{i % 3}"} for i in range(50)]
+        items += [
+            {"user_id": "u1", "course_id": "missing"},
+            {"user_id": "u1", "course_id": "plus"},
+            {"user_id": "nobody", "course_id": "c1"},
+            {"user_id": "u1", "course_id": "paid"},
+            {"user_id": "u1", "course_id": "untyped"},
+        ]
+        with max_queries(4):
+            r = client.post("/subscriptions/enrollments/batch", json=items)
+        assert r.status_code == 200
+        statuses = [item["status"] for item in r.json()]
+        assert statuses == ["already_enrolled"] + ["enrolled"] * 49 + [
+            "course_not_found",
+            "forbidden",
+            "forbidden",
+            "payment_required",
+            "course_not_found",
+        ]
+
+    def test_get_cancel_fee(self, client, db_session, max_queries):
+        add_subscriptions(db_session, ("u1", 0, True), ("u2", 1, True), ("u3", 1, True))
+        add_enrollments(
+            db_session, ("u1", "c1", True), ("u2", "c1", True), ("u3", "c1", True)
+        )
+        with max_queries(1):
+            r = client.get(
+                "/subscriptions/c1/enrollments/cancel-fee",
+                params={"price": 10, "sub_id": 0},
+            )
+        assert r.status_code == 200
+
+    def test_get_users_enrolled_id_only(self, client, db_session, max_queries):
+        add_enrollments(db_session, ("u1", "c1", True), ("u2", "c1", True))
+        with max_queries(1):
+            r = client.get("/subscriptions/c1/enrollments/course/id-only")
+        assert r.json() == {"users": ["u1", "u2"], "next": None}
+
+
+class TestUnenrollAll:
+    @pytest.fixture
+    def enr_command(self, client):
+        main = importlib.import_module("main")
+        enr_command = MagicMock()
+        enr_command.unenroll_all.return_value = ["u1", "u2"]
+        main.app.dependency_overrides[
+            main.enrollment_command_usecase
+        ] = lambda: enr_command
+        return enr_command
+
+    def unenroll_all(self, client):
+        return client.patch(
+            "/subscriptions/c1/enrollments",
+            params={"course_name": "c", "creator_id": "cr", "price": 10, "sub_id": 0},
+        )
+
+    def test_unsubscribed_student_should_roll_back(
+        self, client, db_session, enr_command
+    ):
+        add_subscriptions(db_session, ("u1", 0, True))
+
+        r = self.unenroll_all(client)
+
+        assert r.status_code == 500
+        enr_command.unenroll_all.assert_called_once_with(course_id="c1", commit=False)
+        enr_command.commit.assert_not_called()
+        enr_command.rollback.assert_called_once()
+
+    def test_failed_deposit_should_enroll_students_again(
+        self, client, db_session, enr_command, monkeypatch
+    ):
+        async def pay(user_id, price, creator_id=None):
+            # No transaction is left open across the payments service.
+            enr_command.commit.assert_called_once()
+            return MagicMock(status_code=402)
+
+        async def notify_users_error(users, detail):
+            pass
+
+        main = importlib.import_module("main")
+        monkeypatch.setattr(main, "pay", pay)
+        monkeypatch.setattr(main, "notify_users_error", notify_users_error)
+        add_subscriptions(db_session, ("u1", 0, True), ("u2", 1, True))
+
+        r = self.unenroll_all(client)
+
+        assert r.status_code == 500
+        enr_command.commit.assert_called_once()
+        enr_command.rollback.assert_not_called()
+        enr_command.enroll_many.assert_called_once_with([("u1", "c1"), ("u2", "c1")])
+
+
+class TestEnrolledUsersPagination:
+    def test_should_walk_pages_with_cursor(self, client, db_session, max_queries):
+        add_enrollments(db_session, *((f"u{i}", "c1", True) for i in range(5)))
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            with max_queries(1):
+                r = client.get(
+                    "/subscriptions/c1/enrollments/course/id-only", params=params
+                )
+            pages.append(r.json()["users"])
+            cursor = r.json()["next"]
+            assert r.headers.get("X-Next-Cursor") == cursor
+            if cursor is None:
+                break
+
+        assert pages == [["u0", "u1"], ["u2", "u3"], ["u4"]]
+
+    def test_invalid_cursor_should_return_400(self, client):
+        r = client.get(
+            "/subscriptions/c1/enrollments/course/id-only", params={"cursor": "%%%"}
+        )
+        assert r.status_code == 400
+
+    def test_saturated_executor_should_return_503(self, client):
+        main = importlib.import_module("main")
+        enr_query = MagicMock()
+        enr_query.fetch_users_from_course.side_effect = main.ExecutorSaturatedError
+        main.app.dependency_overrides[main.enrollment_query_usecase] = lambda: enr_query
+
+        r = client.get("/subscriptions/c1/enrollments/course/id-only")
+
+        assert r.status_code == 503
+        assert r.json() == {"detail": main.ExecutorSaturatedError.message}
+
+
+class TestEnrollmentExport:
+    def test_should_stream_ndjson(self, client, db_session, monkeypatch):
+        main = importlib.import_module("main")
+        monkeypatch.setattr(main, "EXPORT_BATCH_SIZE", 2)
+        add_enrollments(
+            db_session,
+            ("u1", "c1", True),
+            ("u2", "c1", False),
+            ("u3", "c1", True),
+            ("u4", "c2", True),
+            ("u5", "c1", True),
+        )
+
+        r = client.get("/subscriptions/enrollments/export", params={"course_id": "c1"})
+
+        assert r.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        assert sorted(line["user_id"] for line in lines) == ["u1", "u3", "u5"]
+        assert set(lines[0]) == {"course_id", "user_id", "active", "updated_at"}
+
+    def test_failing_query_should_return_500(self, client):
+        def stream_enrollments(course_id, only_active, batch_size):
+            raise OperationalError("SELECT", {}, Exception("connection lost"))
+            yield
+
+        main = importlib.import_module("main")
+        enr_query = MagicMock()
+        enr_query.stream_enrollments = stream_enrollments
+        main.app.dependency_overrides[main.enrollment_query_usecase] = lambda: enr_query
+
+        r = client.get("/subscriptions/enrollments/export")
+
+        assert r.status_code == 500
+
+    def test_saturated_executor_should_close_the_stream(self, client, monkeypatch):
+        def stream_enrollments(course_id, only_active, batch_size):
+            yield [("c1", "u1", True, 1)]
+
+        async def run_db(fn, *args, **kwargs):
+            raise main.ExecutorSaturatedError
+
+        main = importlib.import_module("main")
+        batches = stream_enrollments(None, True, 1)
+        enr_query = MagicMock()
+        enr_query.stream_enrollments.return_value = batches
+        main.app.dependency_overrides[main.enrollment_query_usecase] = lambda: enr_query
+        monkeypatch.setattr(main, "run_db", run_db)
+
+        r = client.get("/subscriptions/enrollments/export")
+
+        assert r.status_code == 503
+        assert inspect.getgeneratorstate(batches) == inspect.GEN_CLOSED
+
+
+def scrape(client, name: str) -> float:
+    r = client.get("/metrics")
+    for line in r.text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split(" ")[1])
+    return 0.0
+
+
+class TestCacheMetrics:
+    def test_should_serve_course_cache_stats(self, client, db_session, monkeypatch):
+        async def fetch_courses(cids):
+            return [{"id": cid, "subscription_id": 0, "price": 0} for cid in cids]
+
+        main = importlib.import_module("main")
+        monkeypatch.setattr(main.course_cache, "fetch", fetch_courses)
+        main.course_cache.cache.clear()
+        add_subscriptions(db_session, ("u1", 0, True), ("u2", 0, True))
+        hits = scrape(client, 'cache_hits_total{cache="courses"}')
+        misses = scrape(client, 'cache_misses_total{cache="courses"}')
+
+        for user_id in ("u1", "u2"):
+            r = client.post(
+                "/subscriptions/c1/enrollments", params={"user_id": user_id}
+            )
+            assert r.status_code == 201
+
+        assert scrape(client, 'cache_hits_total{cache="courses"}') == hits + 1
+        assert scrape(client, 'cache_misses_total{cache="courses"}') == misses + 1
+        assert scrape(client, 'cache_entries{cache="courses"}') == 1
+        assert (
+            'cache_evictions_total{cache="subscriptions"} '
+            in client.get("/metrics").text
+        )
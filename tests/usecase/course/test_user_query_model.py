@@ -1,4 +1,8 @@
-from app.usecase.course.course_query_model import CourseReadModel
+from app.usecase.course.course_query_model import (
+    CourseReadModel,
+    CoursesListReadModel,
+)
+from tests.params import course_sub_1
 
 
 class TestCourseQueryModel:
@@ -21,3 +25,18 @@ class TestCourseQueryModel:
             recommendations={},
         )
         assert course.id == "vytxeTZskVKR7C7WgdSP3d"
+
+    def test_courses_list_from_payloads(self):
+        courses = CoursesListReadModel.from_payloads(
+            {"courses": [course_sub_1.dict()], "count": 1},
+            {"courses": [], "count": 0},
+        )
+        assert courses.enrolled.courses[0] == course_sub_1
+        assert courses.unenrolled.count == 0
+
+    def test_courses_list_from_payloads_should_allow_missing_pages(self):
+        courses = CoursesListReadModel.from_payloads(
+            None, {"courses": [course_sub_1.dict()], "count": 1}
+        )
+        assert courses.enrolled.count == 0
+        assert courses.unenrolled.courses[0] == course_sub_1
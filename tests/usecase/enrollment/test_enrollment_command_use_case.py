@@ -21,6 +21,7 @@ class TestEnrollmentCommandUseCase:
     def test_enroll_should_return_enrollment(self):
         session = MagicMock()
         session.query().filter_by = Mock(side_effect=no_enrollments)
+        session.get_bind().dialect.name = "postgresql"
         enrollment_repository = EnrollmentRepositoryImpl(session)
         uow = EnrollmentCommandUseCaseUnitOfWorkImpl(
             session=session, enrollment_repository=enrollment_repository
@@ -47,6 +48,7 @@ class TestEnrollmentCommandUseCase:
     def test_unenroll_should_return_enrollment(self):
         session = MagicMock()
         session.query().filter_by = Mock(side_effect=filter_by_id_user_1_course_1)
+        session.get_bind().dialect.name = "postgresql"
         enrollment_repository = EnrollmentRepositoryImpl(session)
         uow = EnrollmentCommandUseCaseUnitOfWorkImpl(
             session=session, enrollment_repository=enrollment_repository
@@ -70,3 +72,35 @@ class TestEnrollmentCommandUseCase:
 
         with pytest.raises(UserNotEnrolledError):
             enr_command.unenroll("user_1", "course_1")
+
+    def test_unenroll_all_should_return_unenrolled_user_ids(self):
+        session = MagicMock()
+        session.execute().scalars().all = Mock(return_value=["user_1", "user_2"])
+        session.get_bind().dialect.name = "postgresql"
+        enrollment_repository = EnrollmentRepositoryImpl(session)
+        uow = EnrollmentCommandUseCaseUnitOfWorkImpl(
+            session=session, enrollment_repository=enrollment_repository
+        )
+        enr_command = EnrollmentCommandUseCaseImpl(uow=uow)
+
+        user_ids = enr_command.unenroll_all("course_1")
+
+        assert user_ids == ["user_1", "user_2"]
+        session.commit.assert_called_once()
+
+    def test_unenroll_all_without_commit_should_leave_transaction_open(self):
+        session = MagicMock()
+        session.execute().scalars().all = Mock(return_value=["user_1"])
+        session.get_bind().dialect.name = "postgresql"
+        enrollment_repository = EnrollmentRepositoryImpl(session)
+        uow = EnrollmentCommandUseCaseUnitOfWorkImpl(
+            session=session, enrollment_repository=enrollment_repository
+        )
+        enr_command = EnrollmentCommandUseCaseImpl(uow=uow)
+
+        user_ids = enr_command.unenroll_all("course_1", commit=False)
+
+        assert user_ids == ["user_1"]
+        session.commit.assert_not_called()
+        enr_command.rollback()
+        session.rollback.assert_called_once()
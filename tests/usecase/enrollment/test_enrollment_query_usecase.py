@@ -10,13 +10,14 @@ from app.infrastructure.enrollment.enrollment_query_service import (
     EnrollmentQueryServiceImpl,
 )
 from app.usecase.enrollment.enrollment_query_usecase import EnrollmentQueryUseCaseImpl
-from tests.params import no_enrollments
 
 
 class TestEnrollmentQueryUseCase:
     def test_fetch_users_from_course_should_raise_no_students_in_course_error(self):
         session = MagicMock()
-        session.query().filter_by().all = Mock(side_effect=no_enrollments)
+        session.query().filter().filter().distinct().order_by().all = Mock(
+            return_value=[]
+        )
         enr_query_service = EnrollmentQueryServiceImpl(session)
         enr_query = EnrollmentQueryUseCaseImpl(enr_query_service)
         with pytest.raises(NoStudentsInCourseError):
@@ -24,7 +25,7 @@ class TestEnrollmentQueryUseCase:
 
     def test_fetch_courses_from_user_should_raise_no_students_in_course_error(self):
         session = MagicMock()
-        session.query().filter_by().all = Mock(side_effect=no_enrollments)
+        session.query().filter().group_by().order_by().all = Mock(return_value=[])
         enr_query_service = EnrollmentQueryServiceImpl(session)
         enr_query = EnrollmentQueryUseCaseImpl(enr_query_service)
         with pytest.raises(StudentNotEnrolledError):
@@ -32,7 +33,9 @@ class TestEnrollmentQueryUseCase:
 
     def test_get_enrollment_metrics(self):
         session = MagicMock()
-        session.query().filter().group_by().all = Mock(return_value=[("course_1", 1)])
+        session.query().group_by().having().add_columns().order_by().limit().all = Mock(
+            return_value=[("course_1", 1, 3)]
+        )
         enr_query_service = EnrollmentQueryServiceImpl(session)
         enr_query = EnrollmentQueryUseCaseImpl(enr_query_service)
 
@@ -41,5 +44,17 @@ class TestEnrollmentQueryUseCase:
         )
 
         assert len(metrics) == 1
-        assert count == 1
+        assert count == 3
         assert metrics[0].course_id == "course_1"
+
+    def test_count_students_by_sub_type_should_raise_no_students_in_course_error(
+        self,
+    ):
+        session = MagicMock()
+        session.query().select_from().join().filter().group_by().all = Mock(
+            return_value=[]
+        )
+        enr_query_service = EnrollmentQueryServiceImpl(session)
+        enr_query = EnrollmentQueryUseCaseImpl(enr_query_service)
+        with pytest.raises(NoStudentsInCourseError):
+            enr_query.count_students_by_sub_type(id="course_1")
@@ -3,7 +3,10 @@ from unittest.mock import MagicMock, Mock
 import pytest
 
 from app.domain.enrollment.enrollment_exception import NoEnrollmentPermissionError
-from app.domain.subscription.subscription_exception import UserAlreadySubscribedError
+from app.domain.subscription.subscription_exception import (
+    UserAlreadySubscribedError,
+    UserNotSubscribedError,
+)
 from app.infrastructure.subscription.subscription_repository import (
     SubscriptionCommandUseCaseUnitOfWorkImpl,
     SubscriptionRepositoryImpl,
@@ -71,3 +74,28 @@ class TestSubscriptionCommandUseCase:
         sub_command = SubscriptionCommandUseCaseImpl(uow=uow)
         with pytest.raises(NoEnrollmentPermissionError):
             sub_command.check_enr_permission(1, "user_1")
+
+    def test_users_sub_types_should_return_sub_id_per_user(self):
+        session = MagicMock()
+        session.query().filter().all = Mock(return_value=[("user_1", 1), ("user_2", 0)])
+        subscription_repository = SubscriptionRepositoryImpl(session)
+        uow = SubscriptionCommandUseCaseUnitOfWorkImpl(
+            session=session, subscription_repository=subscription_repository
+        )
+        sub_command = SubscriptionCommandUseCaseImpl(uow=uow)
+
+        sub_types = sub_command.users_sub_types(["user_1", "user_2"])
+
+        assert sub_types == {"user_1": 1, "user_2": 0}
+
+    def test_users_sub_types_should_raise_user_not_subscribed_error(self):
+        session = MagicMock()
+        session.query().filter().all = Mock(return_value=[("user_1", 1)])
+        subscription_repository = SubscriptionRepositoryImpl(session)
+        uow = SubscriptionCommandUseCaseUnitOfWorkImpl(
+            session=session, subscription_repository=subscription_repository
+        )
+        sub_command = SubscriptionCommandUseCaseImpl(uow=uow)
+
+        with pytest.raises(UserNotSubscribedError):
+            sub_command.users_sub_types(["user_1", "user_2"])